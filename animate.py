@@ -0,0 +1,318 @@
+"""
+Renders the animated flow diagrams from declarative specs (specs/*.json).
+
+A spec lists the nodes, the flows (one animation step each) and the styling
+that used to be hard-coded in hldgif.py / uberhldgif.py / uberlldgif.py.
+Everything graphviz produces is cached under .render_cache/, keyed by a hash
+of the exact DOT source it was produced from:
+
+  - the layout, by the un-highlighted graph,
+  - the base frame, by the whole pinned graph (every node, edge and label),
+  - each highlight layer, by its own edge's route, style and label.
+
+The layout graph includes every flow label (xlabels take part in placement),
+so editing one label reruns the layout and the base frame. A highlight layer
+is reused when its pinned route and label position come out the same, which
+is usually most of them; labels graphviz moved to make room for the edited one
+are rerun along with it. A rerun with nothing changed renders nothing and
+skips the encode too.
+
+    python animate.py                   # every spec in specs/
+    python animate.py specs/uber_hld.json --format webp
+"""
+import argparse
+import glob
+import hashlib
+import html
+import io
+import json
+import os
+import uuid
+from functools import partial
+
+import graphviz
+from PIL import Image
+
+from gifrender import (
+    FORMATS, choose_dpi, compute_layout, edge_route, encode_highlight_animation, fit_canvas,
+    frame_size, hex_to_rgb, node_pos, open_animation_writer, pixel_budget, pixel_limit, render_jobs,
+    report_rss,
+)
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+CACHE_DIR = os.getenv("RENDER_CACHE_DIR", ".render_cache")
+# Bump when the renderer changes in a way the DOT source doesn't capture
+CACHE_VERSION = "1"
+
+
+# --- SPECS ---
+def load_spec(path):
+    with open(path) as f:
+        spec = json.load(f)
+    spec.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    spec.setdefault("output", spec["name"])
+    return spec
+
+
+def spec_paths(names=None):
+    """Spec files for the given names or paths (all of specs/ when empty)."""
+    if not names:
+        return sorted(glob.glob(os.path.join(SPEC_DIR, "*.json")))
+    paths = []
+    for name in names:
+        path = name if os.path.exists(name) else os.path.join(SPEC_DIR, f"{name}.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No spec named {name} (looked for {path})")
+        paths.append(path)
+    return paths
+
+
+def theme_colors(spec):
+    """Background first, then every color the spec draws with (seeds the shared palette)."""
+    edges = spec["edge_style"]
+    colors = [spec["background"], edges["active"]["color"], edges["inactive"]["color"],
+              edges["inactive"]["fontcolor"], spec["header"]["fontcolor"], spec["node_style"]["fontcolor"]]
+    for node in spec["nodes"].values():
+        colors += [node["fill"], node.get("color", spec["node_style"].get("color"))]
+    return [c for c in dict.fromkeys(colors) if c and c.startswith("#")]
+
+
+def masked_label(text, background):
+    """An HTML-like label drawn on an opaque box of the background color."""
+    text = html.escape(text).replace(" ", "&#160;").replace("\\n", "<BR/>")
+    return (f'<<TABLE BORDER="0" CELLBORDER="0" CELLSPACING="0" CELLPADDING="1" BGCOLOR="{background}">'
+            f'<TR><TD>{text}</TD></TR></TABLE>>')
+
+
+def build_graph(spec, active_index, layout=None, highlight_only=False):
+    """The frame for one step (-1: nothing highlighted); highlight_only keeps just the active edge."""
+    dot = graphviz.Digraph(format='png', engine=spec.get("engine", "neato"))
+    dot.attr(bgcolor='transparent' if highlight_only else spec["background"], **spec.get("graph", {}))
+
+    if not highlight_only and spec.get("header"):
+        header = dict(spec["header"])
+        dot.node('header', label=header.pop("label"), pos=node_pos(layout, 'header', header.pop("pos")),
+                 shape='none', **header)
+
+    node_style = spec["node_style"]
+    for node_id, node in spec["nodes"].items():
+        attrs = dict(node_style, color=node.get("color", node_style.get("color")))
+        if highlight_only:
+            attrs["style"] = 'invis'
+        dot.node(node_id, label=node["label"], shape=node["shape"], fillcolor=node["fill"],
+                 pos=node_pos(layout, node_id, node["pos"]), **attrs)
+
+    edge_style = spec["edge_style"]
+    pad = " " * edge_style.get("label_padding", 1)
+    for i, (src, dst, label) in enumerate(spec["flows"]):
+        is_active = (i == active_index)
+        if highlight_only and not is_active:
+            continue
+        style = edge_style["active" if is_active else "inactive"]
+        xlabel = f"{pad}{label}{pad}"
+        if highlight_only:
+            # The base frame already has this label in gray at the same pinned spot: paint over it
+            xlabel = masked_label(xlabel, spec["background"])
+        dot.edge(src, dst, xlabel=xlabel, fontsize=edge_style.get("fontsize", "10"),
+                 **style, **edge_route(layout, i))
+
+    return dot
+
+
+# --- RENDER CACHE ---
+class RenderCache:
+    """Graphviz outputs on disk, addressed by a hash of their inputs."""
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind, engine, source, no_op=False):
+        h = hashlib.sha256()
+        for part in (CACHE_VERSION, kind, engine, str(int(no_op)), source):
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def has(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so a reader (or a concurrent render) never sees half a file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def _render_job(cache_root, job):
+    """Runs in a worker process: renders one DOT source to PNG and stores it."""
+    key, engine, source, no_op = job
+    png = graphviz.Source(source, engine=engine, format='png').pipe(neato_no_op=2 if no_op else None)
+    RenderCache(cache_root).put(key, png)
+    return png
+
+
+def frame_job(dot, layout, dpi=None):
+    """(cache key, engine, source, no_op) for one frame; with a layout, neato -n2 only draws."""
+    if layout:
+        dot.attr(bb=layout['bb'])
+    if dpi:
+        dot.attr(dpi=f"{dpi:g}")
+    return (RenderCache.key("frame", dot.engine, dot.source, bool(layout)), dot.engine, dot.source, bool(layout))
+
+
+def render_cached(cache, jobs, workers=None, mp_context=None):
+    """
+    Yields one PNG per job, in order; only cache misses go to the process pool.
+    Hits are read from disk one at a time as they are yielded, not up front.
+    """
+    cached = [cache.has(job[0]) for job in jobs]
+    misses = [job for job, hit in zip(jobs, cached) if not hit]
+    cache.misses += len(misses)
+    rendered = render_jobs(partial(_render_job, cache.root), misses, workers, mp_context)
+    for job, hit in zip(jobs, cached):
+        if not hit:
+            yield next(rendered)
+            continue
+        png = cache.get(job[0])
+        # Removed since the check (a cache wipe): render it here
+        yield png if png is not None else _render_job(cache.root, job)
+
+
+def cached_layout(cache, spec):
+    dot = build_graph(spec, -1)
+    key = RenderCache.key("layout", dot.engine, dot.source)
+    data = cache.get(key)
+    if data is not None:
+        return json.loads(data)
+    layout = compute_layout(dot)
+    cache.put(key, json.dumps(layout).encode())
+    return layout
+
+
+# --- ANIMATION ---
+def render_spec(spec, fmt="gif", workers=None, layout_once=True, cache=None, out_dir=".",
+                max_pixels=None, max_memory_mb=None, width=None, progress=None, mp_context=None):
+    """
+    Renders one spec to <out_dir>/<output><ext>. Returns the output path.
+
+    Frames are rasterized at a DPI picked from the layout so they fit the
+    pixel budget (see gifrender.pixel_budget) and, if given, `width`.
+    progress(done, total) is called as steps are encoded; mp_context is passed
+    on to gifrender.render_jobs.
+    """
+    cache = cache or RenderCache()
+    hits, misses = cache.hits, cache.misses
+    output_path = os.path.join(out_dir, f"{spec['output']}{FORMATS[fmt]}")
+    steps = len(spec["flows"])
+    colors = theme_colors(spec)
+    progress = progress or (lambda done, total: print(f"Processing step {done}/{total}..."))
+    print(f"🎬 Rendering {spec['name']} ({steps} steps) -> {output_path}")
+
+    # The un-highlighted layout sizes the frames in both modes
+    layout = cached_layout(cache, spec)
+    budget = pixel_budget(max_pixels, max_memory_mb)
+    dpi = choose_dpi(layout['bb'], budget, width, spec.get("graph", {}).get("dpi"))
+    w, h = frame_size(layout['bb'], dpi)
+    print(f"📐 {w}x{h} px at {dpi} dpi (budget {budget / 1e6:.1f} MP)")
+    if layout_once:
+        # Lay out and route once; each step is only its highlighted edge, composited over one base frame
+        jobs = [frame_job(build_graph(spec, -1, layout), layout, dpi)]
+        jobs += [frame_job(build_graph(spec, i, layout, highlight_only=True), layout, dpi) for i in range(steps)]
+    else:
+        jobs = [frame_job(build_graph(spec, i), None, dpi) for i in [-1] + list(range(steps))]
+
+    # The output is a pure function of its frames, so an unchanged set of frames needs no encode
+    output_key = RenderCache.key("output", fmt, "\n".join(job[0] for job in jobs) + f"\n{spec.get('fps', 1.0)}")
+    stamp = os.path.join(cache.root, "outputs", hashlib.sha256(os.path.abspath(output_path).encode()).hexdigest())
+    if os.path.exists(output_path) and os.path.exists(stamp):
+        with open(stamp) as f:
+            if f.read().strip() == output_key:
+                print(f"✅ {output_path} is up to date.")
+                return output_path
+
+    # Frames are bounded by the budget, so PIL's decompression-bomb guard only has to allow that much
+    with pixel_limit(budget * 2):
+        frames = render_cached(cache, jobs, workers, mp_context)
+        base = next(frames)
+        fps = spec.get("fps", 1.0)
+        # Encode next to the output and rename at the end, so a finished-looking file is always complete
+        root, ext = os.path.splitext(output_path)
+        # Unique per render: two processes finishing the same output never share a partial file
+        partial_path = f"{root}.{os.getpid()}.{uuid.uuid4().hex[:8]}.partial{ext}"
+        try:
+            if layout_once:
+                encode_highlight_animation(partial_path, fps, base, frames, fmt=fmt, theme_colors=colors,
+                                           progress=lambda i: progress(i + 1, steps))
+            else:
+                # The un-highlighted frame fixes the canvas; frames that lay out differently are centered on it
+                with Image.open(io.BytesIO(base)) as first:
+                    canvas = first.size
+                with open_animation_writer(partial_path, fps, fmt, theme_colors=colors) as writer:
+                    for i, png in enumerate(frames):
+                        progress(i + 1, steps)
+                        writer.append(fit_canvas(png, canvas, hex_to_rgb(spec["background"])))
+            os.replace(partial_path, output_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+    os.makedirs(os.path.dirname(stamp), exist_ok=True)
+    with open(stamp, "w") as f:
+        f.write(output_key)
+    print(f"♻️ Graphviz runs reused from cache: {cache.hits - hits}, rerun: {cache.misses - misses}")
+    return output_path
+
+
+def add_render_args(parser):
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel frame renderers (default: GIF_WORKERS or CPU count)")
+    parser.add_argument("--full-layout", action="store_true",
+                        help="rerun the layout for every frame instead of once")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="gif",
+                        help="output format (webp/apng/mp4 are smaller and faster to encode)")
+    parser.add_argument("--max-pixels", type=int, default=None,
+                        help="largest frame in pixels (default: RENDER_MAX_PIXELS or from the memory budget)")
+    parser.add_argument("--max-memory-mb", type=float, default=None,
+                        help="memory budget for encoding (default: RENDER_MAX_MEMORY_MB or 512)")
+    parser.add_argument("--width", type=int, default=None,
+                        help="target frame width in pixels (DPI is picked to match)")
+
+
+def budget_options(args):
+    return {"max_pixels": args.max_pixels, "max_memory_mb": args.max_memory_mb, "width": args.width}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render animated flow diagrams from specs.")
+    parser.add_argument("specs", nargs="*", help="spec names or paths (default: every spec in specs/)")
+    parser.add_argument("--out-dir", default=".", help="where the animations are written")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="render cache location")
+    add_render_args(parser)
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir)
+    for path in spec_paths(args.specs):
+        render_spec(load_spec(path), fmt=args.format, workers=args.workers,
+                    layout_once=not args.full_layout, cache=cache, out_dir=args.out_dir,
+                    **budget_options(args))
+    report_rss("after rendering")
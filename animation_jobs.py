@@ -0,0 +1,202 @@
+"""
+Server-side rendering of highlight-step animations for generated diagrams.
+
+POST /animate turns a React Flow diagram (the JSON /generate returns, plus an
+ordered list of flow steps) into an animate.py spec and queues it on a small
+thread pool, separate from the one /generate uses. Jobs are identified by a
+hash of the spec and output format, so asking for the same animation twice
+returns the same job -- or the finished file straight from disk.
+
+Job status lives in the shared diagram cache (SQLite), so a poll can land on
+any worker. A job is claimed with a renewed lease there, so only one worker
+renders a given job id; finished files are shared through the output
+directory.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import animate
+from gifrender import FORMATS
+from reactflow import FLOW_SCALE
+
+# React Flow node types (see parse_graphviz_to_reactflow) back to graphviz shapes and fills
+TYPE_SHAPES = {
+    "default": ("rect", "#263238"),
+    "imageNode": ("rect", "#1B5E20"),
+    "diamond": ("diamond", "#0D47A1"),
+    "circle": ("ellipse", "#1A237E"),
+    "triangle": ("triangle", "#4A148C"),
+    "database": ("cylinder", "#880E4F"),
+}
+# The generated diagrams borrow the look of the Uber animations
+STYLE_SPEC = os.path.join(animate.SPEC_DIR, "uber_hld.json")
+# parse_graphviz_to_reactflow scales graphviz points by FLOW_SCALE and flips y; neato pins positions in inches
+POINTS_PER_INCH = 72
+
+MEDIA_TYPES = {"gif": "image/gif", "webp": "image/webp", "apng": "image/apng", "mp4": "video/mp4"}
+
+
+class QueueFull(Exception):
+    pass
+
+
+def reactflow_to_spec(nodes, edges, steps=None, title=None, fps=1.0):
+    """
+    Builds an animate.py spec from React Flow nodes/edges. steps are edge ids
+    or {"source", "target", "label"} dicts, in playback order; without steps
+    every edge is one step, in the order given. Raises ValueError on bad input.
+    """
+    with open(STYLE_SPEC) as f:
+        spec = json.load(f)
+
+    spec_nodes = {}
+    top, left, right = 0.0, 0.0, 0.0
+    for node in nodes:
+        if "id" not in node:
+            raise ValueError("Every node needs an id")
+        shape, fill = TYPE_SHAPES.get(node.get("type"), TYPE_SHAPES["default"])
+        pos = node.get("position") or {}
+        x = float(pos.get("x", 0)) / FLOW_SCALE / POINTS_PER_INCH
+        y = -float(pos.get("y", 0)) / FLOW_SCALE / POINTS_PER_INCH
+        top, left, right = max(top, y), min(left, x), max(right, x)
+        label = (node.get("data") or {}).get("label") or node["id"]
+        spec_nodes[str(node["id"])] = {"label": label, "pos": f"{x:.3f},{y:.3f}!", "shape": shape, "fill": fill}
+    if not spec_nodes:
+        raise ValueError("The diagram has no nodes")
+
+    by_id = {str(e.get("id")): e for e in edges}
+    flows = []
+    for i, step in enumerate(steps if steps is not None else edges):
+        if isinstance(step, str):
+            if step not in by_id:
+                raise ValueError(f"Unknown edge in steps: {step}")
+            step = by_id[step]
+        src, dst = str(step.get("source")), str(step.get("target"))
+        if src not in spec_nodes or dst not in spec_nodes:
+            raise ValueError(f"Step {i + 1} connects unknown nodes: {src} -> {dst}")
+        label = step.get("label") or f"{src} -> {dst}"
+        flows.append([src, dst, f"{i + 1}. {label}"])
+    if not flows:
+        raise ValueError("Nothing to animate: no steps and no edges")
+
+    spec.update(name="diagram", output="diagram", fps=fps, nodes=spec_nodes, flows=flows)
+    spec["header"] = dict(spec["header"], label=(title or "Request flow").upper(),
+                          pos=f"{(left + right) / 2:.3f},{top + 3:.3f}!")
+    return spec
+
+
+def spec_hash(spec, fmt):
+    payload = json.dumps({"spec": spec, "format": fmt}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+
+class AnimationJobs:
+    def __init__(self, cache, out_dir=".animations", workers=1, render_workers=2, max_queued=8):
+        """
+        cache: the shared DiagramCache (job status and claims). workers:
+        animations rendered at once here; render_workers: graphviz processes
+        each of them may use; max_queued: jobs waiting here before submit() refuses.
+        """
+        self.cache = cache
+        self.out_dir = out_dir
+        self.render_workers = render_workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="animate")
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def result_path(self, job_id, fmt):
+        return os.path.join(self.out_dir, f"{job_id}{FORMATS[fmt]}")
+
+    @staticmethod
+    def _key(job_id):
+        return f"animation:{job_id}"
+
+    def _done_on_disk(self, job_id, fmt):
+        path = self.result_path(job_id, fmt)
+        if not os.path.exists(path):
+            return None
+        return {"id": job_id, "status": "done", "format": fmt, "progress": None, "error": None,
+                "created": os.path.getmtime(path), "finished": os.path.getmtime(path)}
+
+    def _status(self, job_id):
+        hit = self.cache.get(self._key(job_id), max_age=self.cache.stale_ttl)
+        return hit[0] if hit else None
+
+    def _update(self, job, **fields):
+        job.update(fields)
+        self.cache.set(self._key(job["id"]), job)
+
+    def submit(self, spec, fmt="gif"):
+        """Queues a render (or returns the existing job for the same spec). Returns the job status."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        job_id = spec_hash(spec, fmt)
+        job = self._status(job_id)
+        if job and job["status"] != "failed":
+            return job
+        cached = self._done_on_disk(job_id, fmt)
+        if cached:
+            return cached
+
+        with self._lock:
+            if self._queued >= self.max_queued:
+                raise QueueFull("Too many animations queued; try again shortly")
+            # Claimed across workers: whoever holds the lease renders it
+            owner = uuid.uuid4().hex
+            if not self.cache.try_lease(self._key(job_id), owner):
+                return self._status(job_id) or {"id": job_id, "status": "queued", "format": fmt, "progress": None,
+                                                "error": None, "created": time.time(), "finished": None}
+            self._queued += 1
+        job = {"id": job_id, "status": "queued", "format": fmt,
+               "progress": {"done": 0, "total": len(spec["flows"])}, "error": None,
+               "created": time.time(), "finished": None}
+        self._update(job)
+        self._pool.submit(self._run, job, owner, dict(spec, output=job_id), fmt)
+        return dict(job)
+
+    def _run(self, job, owner, spec, fmt):
+        with self._lock:
+            self._queued -= 1
+        self._update(job, status="running")
+
+        def render():
+            os.makedirs(self.out_dir, exist_ok=True)
+            animate.render_spec(
+                spec, fmt=fmt, workers=self.render_workers, out_dir=self.out_dir,
+                progress=lambda done, total: self._update(job, progress={"done": done, "total": total}),
+                # This runs on a thread of the server: forking it could copy held locks into the workers
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            return dict(job, status="done", finished=time.time())
+
+        try:
+            # The lease is renewed for as long as the render runs; the final status is stored with it
+            self.cache.compute_leased(self._key(job["id"]), owner, render)
+            print(f"🎞️ Animation {job['id']} ready.")
+        except Exception as e:
+            print(f"❌ Animation {job['id']} failed: {e}")
+            self._update(job, status="failed", error=str(e), finished=time.time())
+
+    def get(self, job_id):
+        if not re.fullmatch(r"[0-9a-f]{20}", job_id):
+            return None
+        job = self._status(job_id)
+        if job:
+            return job
+        for fmt in FORMATS:
+            cached = self._done_on_disk(job_id, fmt)
+            if cached:
+                return cached
+        return None
+
+    def stop(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
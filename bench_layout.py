@@ -0,0 +1,137 @@
+"""
+Benchmark: in-process layered layout vs the graphviz `dot` binary.
+
+Generates a seeded corpus of Gemini-sized architecture graphs, lays each out
+with both engines and reports timing plus a layout-quality check (edge
+crossings, counted on the edge polylines both engines return).
+
+    python bench_layout.py [--graphs 40] [--min-nodes 10] [--max-nodes 30] [--seed 7]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import graphviz
+
+from fast_layout import layout_dot_source
+
+SHAPES = ["box", "circle", "diamond", "cylinder"]
+WORDS = ["User", "API", "Gateway", "Auth", "Cache", "DB", "Queue", "Worker",
+         "Search", "Feed", "Media", "CDN", "Notify", "Billing", "Logs", "Index"]
+
+
+def random_graph(rng, n_nodes):
+    """Layered service graph with a few skip edges and back edges, like Gemini output."""
+    names = [f"{rng.choice(WORDS)}{i}" for i in range(n_nodes)]
+    lines = ["strict digraph G {"]
+    for name in names:
+        lines.append(f'  {name} [shape={rng.choice(SHAPES)}, label="{name} Service"];')
+    for i in range(1, n_nodes):
+        parent = rng.randrange(max(0, i - 4), i)
+        lines.append(f"  {names[parent]} -> {names[i]};")
+    for _ in range(n_nodes // 3):
+        a, b = rng.sample(range(n_nodes), 2)
+        style = rng.choice(["solid", "dashed"])
+        lines.append(f"  {names[a]} -> {names[b]} [style={style}];")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def graphviz_layout(dot_code):
+    src = graphviz.Source(dot_code)
+    src.engine = 'dot'
+    return json.loads(src.pipe(format='json').decode('utf-8'))
+
+
+# --- CROSSING CHECK ---
+def _polyline(edge):
+    """Edge control points as a polyline, dropping graphviz arrow end markers."""
+    points = []
+    for part in edge.get("pos", "").split():
+        if part.startswith(("e,", "s,")):
+            continue
+        x, y = part.split(",")[:2]
+        points.append((float(x), float(y)))
+    return points
+
+
+def _segments_cross(p1, p2, p3, p4):
+    def orient(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    d1, d2 = orient(p3, p4, p1), orient(p3, p4, p2)
+    d3, d4 = orient(p1, p2, p3), orient(p1, p2, p4)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+
+def edge_crossings(layout):
+    """Number of edge pairs whose routes cross (edges sharing an endpoint are skipped)."""
+    edges = layout.get("edges", [])
+    lines = [_polyline(e) for e in edges]
+    count = 0
+    for i in range(len(edges)):
+        for j in range(i + 1, len(edges)):
+            ends_i = {edges[i]["tail"], edges[i]["head"]}
+            if ends_i & {edges[j]["tail"], edges[j]["head"]}:
+                continue
+            a, b = lines[i], lines[j]
+            if any(_segments_cross(a[k], a[k + 1], b[m], b[m + 1])
+                   for k in range(len(a) - 1) for m in range(len(b) - 1)):
+                count += 1
+    return count
+
+
+def timed(fn, arg):
+    start = time.perf_counter()
+    result = fn(arg)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graphs", type=int, default=40)
+    parser.add_argument("--min-nodes", type=int, default=10)
+    parser.add_argument("--max-nodes", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [random_graph(rng, rng.randint(args.min_nodes, args.max_nodes)) for _ in range(args.graphs)]
+
+    fast_ms, fast_cross = [], []
+    dot = {}  # corpus index -> (ms, crossings); may stop short if dot goes missing
+    have_dot = True
+    for i, dot_code in enumerate(corpus):
+        layout, ms = timed(layout_dot_source, dot_code)
+        fast_ms.append(ms)
+        fast_cross.append(edge_crossings(layout))
+        if not have_dot:
+            continue
+        try:
+            layout, ms = timed(graphviz_layout, dot_code)
+        except graphviz.ExecutableNotFound:
+            print("⚠️ graphviz `dot` not found; reporting the fast layout only.")
+            have_dot = False
+            continue
+        dot[i] = (ms, edge_crossings(layout))
+    dot_ms = [dot[i][0] for i in sorted(dot)]
+    dot_cross = [dot[i][1] for i in sorted(dot)]
+
+    print(f"Corpus: {len(corpus)} graphs, {args.min_nodes}-{args.max_nodes} nodes (seed {args.seed})")
+    print(f"{'engine':<8} {'median ms':>10} {'p95 ms':>10} {'mean crossings':>16}")
+    rows = [("fast", fast_ms, fast_cross)]
+    if dot_ms:
+        rows.append(("dot", dot_ms, dot_cross))
+    for name, ms, cross in rows:
+        p95 = sorted(ms)[int(len(ms) * 0.95) - 1]
+        print(f"{name:<8} {statistics.median(ms):>10.2f} {p95:>10.2f} {statistics.mean(cross):>16.2f}")
+    if dot_ms:
+        # Compare only the graphs both engines laid out
+        speedup = statistics.median(dot_ms) / statistics.median([fast_ms[i] for i in sorted(dot)])
+        worse = sum(fast_cross[i] > dot[i][1] for i in dot)
+        print(f"Speedup: {speedup:.1f}x; fast layout has more crossings than dot on {worse}/{len(dot_cross)} graphs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Benchmark: where the time goes in the animation pipeline (animate.py).
+
+Runs every spec in specs/ (the hldgif.py / uberhldgif.py / uberlldgif.py
+diagrams) plus seeded synthetic specs of increasing size through the
+layout-once pipeline, serially and without the render cache, and reports
+per-stage wall time:
+
+    build      Digraph construction for the base frame and every highlight layer
+    layout     one graphviz layout (-Tjson)
+    rasterize  graphviz -n2 PNG rendering of every frame
+    decode     PIL PNG decoding
+    numpy      array conversion and compositing
+    encode     palette mapping and GIF writing
+
+plus peak memory (Python allocations via tracemalloc, and the largest
+graphviz child process). Results can be saved as a baseline and later runs
+compared against it; baselines are machine-specific, so compare on the same box.
+
+    python bench_render.py [--sizes 10x15,25x40,50x80,100x160] [--seed 7]
+    python bench_render.py --save-baseline            # writes bench_baselines/render.json
+    python bench_render.py --compare                  # diffs against it
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+import graphviz
+
+import animate
+from gifrender import choose_dpi, compute_layout, encode_highlight_animation, frame_size, pixel_budget
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ["build", "layout", "rasterize", "decode", "numpy", "encode"]
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines")
+# Stages that get this much slower than the baseline are flagged
+REGRESSION = 1.2
+
+SHAPES = ["rect", "hexagon", "diamond", "cylinder", "cds", "trapezium"]
+FILLS = ["#1A237E", "#1B5E20", "#0D47A1", "#4A148C", "#B71C1C", "#880E4F", "#BF360C", "#263238"]
+WORDS = ["User", "API", "Gateway", "Auth", "Cache", "DB", "Queue", "Worker",
+         "Search", "Feed", "Media", "CDN", "Notify", "Billing", "Logs", "Index"]
+VERBS = ["Request", "Lookup", "Publish", "Persist", "Notify", "Return", "Sync", "Fetch"]
+
+
+class StageTimes:
+    """Accumulates wall time per stage; pass it where a `stage` hook is accepted."""
+
+    def __init__(self):
+        self.ms = defaultdict(float)
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.ms[stage] += (time.perf_counter() - start) * 1000
+
+
+def synthetic_spec(rng, template, n_nodes, n_flows):
+    """A spec shaped like the Uber diagrams: nodes on a pinned grid, random flows between them."""
+    spec = copy.deepcopy(template)
+    cols = math.ceil(math.sqrt(n_nodes))
+    nodes = {}
+    for i in range(n_nodes):
+        row, col = divmod(i, cols)
+        nodes[f"n{i}"] = {"label": f"{rng.choice(WORDS)} {i}\n(Service)", "pos": f"{col * 10},{row * 10}!",
+                          "shape": rng.choice(SHAPES), "fill": rng.choice(FILLS)}
+    flows = []
+    for i in range(n_flows):
+        src, dst = rng.sample(list(nodes), 2)
+        flows.append([src, dst, f"{i + 1}. {rng.choice(VERBS)} {rng.choice(WORDS)}"])
+    spec.update(name=f"synthetic_{n_nodes}x{n_flows}", nodes=nodes, flows=flows)
+    spec["header"] = dict(spec["header"], label=f"SYNTHETIC {n_nodes} NODES / {n_flows} FLOWS",
+                          pos=f"{(cols - 1) * 5},{math.ceil(n_nodes / cols) * 10 + 5}!")
+    return spec
+
+
+def child_peak_mb():
+    """Largest resident size of any finished child process (the graphviz runs), in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def bench_spec(spec, out_dir, max_pixels=None):
+    times = StageTimes()
+    steps = len(spec["flows"])
+
+    with times("build"):
+        layout_graph = animate.build_graph(spec, -1)
+    with times("layout"):
+        layout = compute_layout(layout_graph)
+    dpi = choose_dpi(layout["bb"], pixel_budget(max_pixels), dpi=spec.get("graph", {}).get("dpi"))
+    with times("build"):
+        jobs = [animate.frame_job(animate.build_graph(spec, -1, layout), layout, dpi)]
+        jobs += [animate.frame_job(animate.build_graph(spec, i, layout, highlight_only=True), layout, dpi)
+                 for i in range(steps)]
+    with times("rasterize"):
+        pngs = [graphviz.Source(source, engine=engine, format="png").pipe(neato_no_op=2)
+                for _, engine, source, _ in jobs]
+
+    tracemalloc.start()
+    try:
+        encode_highlight_animation(os.path.join(out_dir, f"{spec['name']}.gif"), spec.get("fps", 1.0),
+                                   pngs[0], pngs[1:], theme_colors=animate.theme_colors(spec), stage=times)
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+    w, h = frame_size(layout["bb"], dpi)
+    return {
+        "nodes": len(spec["nodes"]),
+        "flows": steps,
+        "pixels": w * h,
+        "ms": {stage: round(times.ms[stage], 1) for stage in STAGES},
+        "total_ms": round(sum(times.ms.values()), 1),
+        "python_peak_mb": round(peak, 1),
+    }
+
+
+def print_table(results):
+    print(f"{'case':<24} {'nodes':>5} {'flows':>5} {'MP':>5} "
+          + " ".join(f"{s:>9}" for s in STAGES) + f" {'total ms':>9} {'peak MB':>8}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['nodes']:>5} {r['flows']:>5} {r['pixels'] / 1e6:>5.1f} "
+              + " ".join(f"{r['ms'][s]:>9.1f}" for s in STAGES)
+              + f" {r['total_ms']:>9.1f} {r['python_peak_mb']:>8.1f}")
+
+
+def compare(results, baseline):
+    """Prints new/baseline ratios per case and stage; returns the number of regressions."""
+    regressions = 0
+    print(f"\nAgainst baseline ({baseline['created']}):")
+    for name, r in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            print(f"  {name}: no baseline")
+            continue
+        parts = []
+        for key, new_v, old_v in [(s, r["ms"][s], old["ms"].get(s, 0)) for s in STAGES] + \
+                [("total", r["total_ms"], old["total_ms"]), ("peak", r["python_peak_mb"], old["python_peak_mb"])]:
+            if not old_v:
+                continue
+            ratio = new_v / old_v
+            # Sub-5ms stages are mostly noise
+            flag = " ⚠️" if ratio > REGRESSION and max(new_v, old_v) >= 5 else ""
+            regressions += bool(flag)
+            parts.append(f"{key} {ratio:.2f}x{flag}")
+        print(f"  {name}: " + ", ".join(parts))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10x15,25x40,50x80,100x160",
+                        help="synthetic specs as NODESxFLOWS, comma separated (empty for none)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-specs", action="store_true", help="skip the specs in specs/")
+    parser.add_argument("--max-pixels", type=int, default=None, help="frame pixel budget, as in animate.py")
+    parser.add_argument("--baseline", default=os.path.join(BASELINE_DIR, "render.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    specs = [] if args.no_specs else [animate.load_spec(p) for p in animate.spec_paths()]
+    rng = random.Random(args.seed)
+    template = animate.load_spec(os.path.join(animate.SPEC_DIR, "uber_hld.json"))
+    for size in filter(None, args.sizes.split(",")):
+        n_nodes, n_flows = (int(v) for v in size.lower().split("x"))
+        specs.append(synthetic_spec(rng, template, n_nodes, n_flows))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for spec in specs:
+            try:
+                results[spec["name"]] = bench_spec(spec, out_dir, args.max_pixels)
+            except graphviz.ExecutableNotFound:
+                print("⚠️ graphviz not found; the render benchmark needs the `neato` binary.")
+                return
+
+    print_table(results)
+    child = child_peak_mb()
+    if child is not None:
+        print(f"Largest graphviz process: {child:.1f} MB")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline first.")
+        else:
+            with open(args.baseline) as f:
+                regressions = compare(results, json.load(f))
+            print(f"{regressions} stage(s) more than {REGRESSION:.1f}x slower than the baseline.")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M"), "seed": args.seed, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
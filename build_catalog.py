@@ -0,0 +1,77 @@
+"""
+Builds catalog.json: the curated diagrams (the static scripts and the
+animation specs) converted to React Flow JSON once, with the topic aliases
+/generate answers them for. Every diagram is laid out by graphviz with its
+own engine, so the dot and neato binaries must be installed.
+
+    python build_catalog.py [--out catalog.json]
+"""
+import argparse
+import importlib
+import json
+import os
+
+import animate
+from catalog import default_path, normalize_topic
+from reactflow import parse_graphviz_to_reactflow
+
+# (id, source, title, aliases). Sources are a static diagram module or "spec:<name>" from specs/
+CATALOG = [
+    ("dns_hld", "dnswithcolour", "DNS: High Level Design",
+     ["dns", "dns hld", "domain name system", "dns high level", "dns resolution", "dns server"]),
+    ("dns_hld_advanced", "dnsWithoutcolour", "DNS: advanced HLD with cross-cutting services",
+     ["dns advanced", "advanced dns", "dns cross cutting services"]),
+    ("dns_lld", "dnslldwithcolour", "DNS: Low Level Design",
+     ["dns lld", "dns low level", "dns resolver internals", "dns resolver"]),
+    ("dns_service_mesh", "spec:dns_hld", "DNS: enterprise service mesh pipeline",
+     ["dns service mesh", "enterprise dns", "dns enterprise service mesh"]),
+    ("uber_hld", "spec:uber_hld", "Uber: dispatch & matching HLD",
+     ["uber", "uber hld", "uber high level", "ride sharing", "ride hailing", "uber dispatch"]),
+    ("uber_lld", "spec:uber_lld", "Uber: component logic & design patterns LLD",
+     ["uber lld", "uber low level", "uber design patterns"]),
+    ("stranger_things", "darkthemeST", "Stranger Things: advanced LLD",
+     ["stranger things", "stranger things lld"]),
+    ("linkedin_influencer", "bluebglld", "LinkedIn influencer LLD",
+     ["linkedin influencer", "rahul maheshwari", "linkedin influencer lld"]),
+]
+
+
+def source_dot(source):
+    """(DOT source, graphviz engine) for a catalog source."""
+    if source.startswith("spec:"):
+        spec = animate.load_spec(os.path.join(animate.SPEC_DIR, f"{source[5:]}.json"))
+        # The title node only makes sense in the animation
+        dot = animate.build_graph(dict(spec, header=None), -1)
+    else:
+        dot = importlib.import_module(source).build()
+    # The source's own engine: the specs pin every node with neato, the scripts rely on dot's clusters
+    return dot.source, dot.engine
+
+
+def build_catalog():
+    diagrams, aliases = {}, {}
+    for diagram_id, source, title, names in CATALOG:
+        # Always graphviz: the in-process fast layout ignores pinned positions and clusters
+        diagram = parse_graphviz_to_reactflow(*source_dot(source))
+        if not diagram:
+            raise RuntimeError(f"Could not convert {source}")
+        diagrams[diagram_id] = {"title": title, "source": source, "diagram": diagram}
+        for name in names + [title]:
+            alias = normalize_topic(name)
+            if aliases.get(alias, diagram_id) != diagram_id:
+                raise ValueError(f"Alias {alias!r} is used by both {aliases[alias]} and {diagram_id}")
+            aliases[alias] = diagram_id
+        print(f"✅ {diagram_id}: {len(diagram['nodes'])} nodes, {len(diagram['edges'])} edges")
+    return {"version": 1, "aliases": aliases, "diagrams": diagrams}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=default_path())
+    args = parser.parse_args()
+
+    catalog = build_catalog()
+    with open(args.out, "w") as f:
+        json.dump(catalog, f, separators=(",", ":"), ensure_ascii=False)
+        f.write("\n")
+    print(f"📚 Wrote {len(catalog['diagrams'])} diagrams, {len(catalog['aliases'])} aliases to {args.out}")
@@ -0,0 +1,59 @@
+"""
+Prebuilt diagram catalog.
+
+build_catalog.py runs the repo's hand-made diagrams through
+parse_graphviz_to_reactflow once and writes catalog.json. /generate answers
+topics that match one of the catalog's aliases straight from memory: no
+search, scrape or Gemini call. The file is read on the first lookup, not at
+import time.
+"""
+import json
+import os
+import re
+import threading
+
+# Words that don't change which diagram a topic means ("DNS system design" == "dns")
+FILLER_WORDS = {"a", "an", "the", "of", "for", "design", "system", "architecture", "diagram"}
+
+
+def normalize_topic(topic):
+    words = re.sub(r"[^a-z0-9]+", " ", topic.lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+class Catalog:
+    def __init__(self, path):
+        self.path = path
+        self._aliases = None
+        self._diagrams = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._aliases is not None:
+                return
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                print(f"⚠️ No diagram catalog at {self.path}; run build_catalog.py to create it.")
+                data = {}
+            self._diagrams = data.get("diagrams", {})
+            self._aliases = data.get("aliases", {})
+            print(f"📚 Loaded {len(self._diagrams)} catalog diagrams ({len(self._aliases)} aliases).")
+
+    def lookup(self, topic):
+        """The catalog's React Flow diagram for a topic, or None."""
+        if self._aliases is None:
+            self._load()
+        diagram_id = self._aliases.get(normalize_topic(topic))
+        return self._diagrams[diagram_id]["diagram"] if diagram_id else None
+
+    def __len__(self):
+        if self._aliases is None:
+            self._load()
+        return len(self._diagrams)
+
+
+def default_path():
+    return os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json"))
@@ -25,7 +25,7 @@ import {
 
 import Sidebar from './Sidebar';
 import HandWriter from './HandWriter';
-import { DatabaseNode, CircleNode, ImageNode, TextNode, DiamondNode, TriangleNode, AnnotationNode } from './CustomNodes';
+import { DatabaseNode, CircleNode, ImageNode, TextNode, DiamondNode, TriangleNode, AnnotationNode, RoutedEdge } from './CustomNodes';
 
 // Define Node Types OUTSIDE component
 const nodeTypes = {
@@ -39,6 +39,9 @@ const nodeTypes = {
   default: DiamondNode 
 };
 
+// Generated edges follow graphviz's routes instead of being rerouted on the client
+const edgeTypes = { routed: RoutedEdge };
+
 export default function App() {
   return (
     <ReactFlowProvider>
@@ -262,11 +265,37 @@ const FlowCanvas = () => {
   const onNodeClick = useCallback((event: React.MouseEvent, node: Node) => {
     if (toolMode === 'eraser') setNodes((nds) => nds.filter((n) => n.id !== node.id));
   }, [toolMode, setNodes]);
+
+  // Summary nodes of a reduced (level-of-detail) diagram: double-click swaps in the nodes they stand for
+  const expandedGroups = useRef<string[]>([]);
+  const onNodeDoubleClick = useCallback(async (event: React.MouseEvent, node: Node) => {
+    const handle = node.data?.expand; if (!handle) return;
+    try {
+      // Groups already expanded here get edges to their real nodes, not to the summary node that is gone
+      const expanded = encodeURIComponent(expandedGroups.current.join(','));
+      const res = await axios.get(`http://localhost:8000/expand/${handle.diagram}/${encodeURIComponent(node.id)}?edge_routes=true&expanded=${expanded}`);
+      expandedGroups.current = [...expandedGroups.current, node.id];
+      const newEdges = res.data.edges.map((e: any) => ({ ...e, animated: isAnimated, style: { stroke: '#64748b', strokeWidth: 2, strokeDasharray: e.data?.isDashed ? "5,5" : "0" } }));
+      setNodes((nds) => nds.filter((n) => n.id !== node.id).concat(res.data.nodes));
+      setEdges((eds) => eds.filter((e) => e.source !== node.id && e.target !== node.id).concat(newEdges));
+    } catch (error) { console.error(error); }
+  }, [isAnimated, setNodes, setEdges]);
   
+  // 🔮 Warm the server's search/scrape for the topic while the user is still typing
+  const clientId = useMemo(() => Math.random().toString(36).slice(2), []);
+  useEffect(() => {
+    if (topic.trim().length < 3) return;
+    const timer = setTimeout(() => {
+      axios.post('http://localhost:8000/prefetch', { topic, client_id: clientId }).catch(() => {});
+    }, 600);
+    return () => clearTimeout(timer);
+  }, [topic, clientId]);
+
   const generateDiagram = async () => {
     if (!topic) return; setLoading(true);
     try {
-      const res = await axios.post('http://localhost:8000/generate', { topic });
+      const res = await axios.post('http://localhost:8000/generate', { topic, edge_routes: true });
+      expandedGroups.current = [];
       setNodes(res.data.nodes);
       const formattedEdges = res.data.edges.map((e: any) => ({ ...e, animated: isAnimated, style: { stroke: '#64748b', strokeWidth: 2, strokeDasharray: e.data?.isDashed ? "5,5" : "0" } }));
       setEdges(formattedEdges); setTimeout(() => setViewport({ x: 0, y: 0, zoom: 0.8 }), 100);
@@ -344,7 +373,7 @@ const FlowCanvas = () => {
         >
           <ReactFlow
             nodes={nodes} edges={edges} onNodesChange={onNodesChange} onEdgesChange={onEdgesChange} onConnect={onConnect} 
-            nodeTypes={nodeTypes} onDrop={onDrop} onDragOver={onDragOver} onNodeClick={onNodeClick} 
+            nodeTypes={nodeTypes} edgeTypes={edgeTypes} onDrop={onDrop} onDragOver={onDragOver} onNodeClick={onNodeClick} onNodeDoubleClick={onNodeDoubleClick} 
             deleteKeyCode={['Backspace', 'Delete']} fitView 
             panOnDrag={toolMode === 'pan'} selectionOnDrag={toolMode === 'select'} selectionMode={SelectionMode.Partial} panOnScroll={true} zoomOnScroll={toolMode !== 'draw'} 
           >
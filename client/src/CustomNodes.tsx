@@ -1,6 +1,6 @@
 /* eslint-disable */
 import { useState, useEffect, useRef } from 'react';
-import { Handle, Position, NodeResizer } from 'reactflow';
+import { Handle, Position, NodeResizer, BaseEdge, getStraightPath } from 'reactflow';
 
 // 🛠️ Helper: Auto-expanding Text Area
 const EditableLabel = ({ value, onChange, istextNode = false }: any) => {
@@ -170,4 +170,33 @@ export const AnnotationNode = ({ data, selected }: any) => {
       </svg>
     </div>
   );
-};
\ No newline at end of file
+};
+// 🧭 Edge drawn along graphviz's own route (server sends data.points with edge_routes)
+// Routes run center to center in layout coordinates, so the path is bent linearly
+// to start and end on the real handles -- which also keeps it attached when nodes are dragged.
+export const RoutedEdge = ({ sourceX, sourceY, targetX, targetY, data, style, markerEnd, label, labelStyle, labelShowBg, labelBgStyle, labelBgPadding, labelBgBorderRadius }: any) => {
+  const pts: number[] = data?.points || [];
+  const n = pts.length / 2;
+  if (n < 2) {
+    const [path, labelX, labelY] = getStraightPath({ sourceX, sourceY, targetX, targetY });
+    return <BaseEdge path={path} markerEnd={markerEnd} style={style} label={label} labelX={labelX} labelY={labelY} labelStyle={labelStyle} labelShowBg={labelShowBg} labelBgStyle={labelBgStyle} labelBgPadding={labelBgPadding} labelBgBorderRadius={labelBgBorderRadius} />;
+  }
+  const end = data.arrow || [pts[pts.length - 2], pts[pts.length - 1]];
+  const sx = sourceX - pts[0], sy = sourceY - pts[1];
+  const ex = targetX - end[0], ey = targetY - end[1];
+  const at = (i: number) => {
+    const t = i / (n - 1);
+    return `${pts[2 * i] + sx + (ex - sx) * t},${pts[2 * i + 1] + sy + (ey - sy) * t}`;
+  };
+
+  let path = `M ${at(0)}`;
+  if ((n - 1) % 3 === 0) {
+    for (let i = 1; i < n; i += 3) path += ` C ${at(i)} ${at(i + 1)} ${at(i + 2)}`;
+  } else {
+    for (let i = 1; i < n; i++) path += ` L ${at(i)}`;
+  }
+  if (data.arrow) path += ` L ${targetX},${targetY}`;
+
+  const [labelX, labelY] = at(Math.floor(n / 2)).split(',').map(Number);
+  return <BaseEdge path={path} markerEnd={markerEnd} style={style} label={label} labelX={labelX} labelY={labelY} labelStyle={labelStyle} labelShowBg={labelShowBg} labelBgStyle={labelBgStyle} labelBgPadding={labelBgPadding} labelBgBorderRadius={labelBgBorderRadius} />;
+};
@@ -0,0 +1,337 @@
+"""
+Diagram result cache shared by every server worker.
+
+Backed by a local SQLite database in WAL mode, so all worker processes on the
+box see the same entries, and used for single-flight: only one worker
+generates a given topic at a time while the others wait for its result.
+It also keeps decayed per-topic access counts, the shared LLM-call budget
+used by the prewarmer, the outbound token buckets (outbound.py) and the
+prefetch budget (prefetch.py).
+
+A failed build is remembered for a few seconds (error_ttl), so the callers
+waiting on it get the error instead of each retrying the build in turn.
+purge() drops what has outlived stale_ttl; the prewarm loop calls it.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS diagrams (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key     TEXT PRIMARY KEY,
+    owner   TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS access (
+    key       TEXT PRIMARY KEY,
+    topic     TEXT NOT NULL,
+    score     REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS llm_calls (
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    host    TEXT PRIMARY KEY,
+    tokens  REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prefetch_starts (
+    host TEXT NOT NULL,
+    at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prefetch_inflight (
+    key     TEXT PRIMARY KEY,
+    started REAL NOT NULL
+);
+"""
+
+# Access scores halve every this many seconds, so yesterday's spike fades out
+ACCESS_HALF_LIFE = 6 * 3600
+
+
+def _decay(score, elapsed):
+    return score * 0.5 ** (elapsed / ACCESS_HALF_LIFE)
+
+
+# Failed builds are stored under this prefix, next to the key they failed for
+FAILED_PREFIX = "failed:"
+
+
+def cache_key(topic):
+    return " ".join(topic.lower().split())
+
+
+class BuildFailed(Exception):
+    """Another caller's build of this key just failed; raised instead of building it again."""
+
+
+class DiagramCache:
+    def __init__(self, path, ttl=86400, stale_ttl=7 * 86400, lease_seconds=30, poll_interval=0.25,
+                 error_ttl=15):
+        """
+        ttl: how long an entry is fresh; stale_ttl: how long it may still be
+        served while refreshing; error_ttl: how long a failed build is reported
+        to callers instead of retried.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork (gunicorn preload)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("decay", 2, _decay, deterministic=True)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key, max_age=None):
+        """Returns (value, age_seconds) or None when missing or older than max_age."""
+        row = self._conn().execute(
+            "SELECT value, created_at FROM diagrams WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        max_age = self.ttl if max_age is None else max_age
+        if age > max_age:
+            return None
+        return json.loads(row[0]), age
+
+    def set(self, key, value):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO diagrams (key, value, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time()),
+        )
+
+    def purge(self, prefix_ttls=None):
+        """
+        Deletes entries (and access counts) older than stale_ttl, and entries
+        under a key prefix older than prefix_ttls[prefix] seconds (e.g. the
+        prefetched "context:" rows). Returns the number of rows deleted.
+        """
+        now = time.time()
+        ttls = {FAILED_PREFIX: self.error_ttl, **(prefix_ttls or {})}
+        conn = self._conn()
+        deleted = conn.execute("DELETE FROM diagrams WHERE created_at < ?", (now - self.stale_ttl,)).rowcount
+        for prefix, ttl in ttls.items():
+            deleted += conn.execute(
+                "DELETE FROM diagrams WHERE substr(key, 1, ?) = ? AND created_at < ?",
+                (len(prefix), prefix, now - ttl),
+            ).rowcount
+        deleted += conn.execute("DELETE FROM access WHERE last_seen < ?", (now - self.stale_ttl,)).rowcount
+        deleted += conn.execute("DELETE FROM leases WHERE expires < ?", (now - self.lease_seconds,)).rowcount
+        return deleted
+
+    # --- POPULARITY ---
+    def record_access(self, key, topic):
+        now = time.time()
+        self._conn().execute(
+            """
+            INSERT INTO access (key, topic, score, last_seen) VALUES (?, ?, 1, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                score = decay(score, excluded.last_seen - last_seen) + 1,
+                last_seen = excluded.last_seen
+            """,
+            (key, topic, now),
+        )
+
+    def hottest(self, limit):
+        """Returns [(key, topic)] with the highest decayed access score first."""
+        now = time.time()
+        return self._conn().execute(
+            "SELECT key, topic FROM access ORDER BY decay(score, ? - last_seen) DESC LIMIT ?",
+            (now, limit),
+        ).fetchall()
+
+    def spend_llm_budget(self, limit, window, calls=1):
+        """Atomically takes `calls` LLM calls from a budget of `limit` calls per `window` seconds."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM llm_calls WHERE at < ?", (now - window,))
+            (used,) = conn.execute("SELECT COUNT(*) FROM llm_calls").fetchone()
+            if used + calls > limit:
+                return False
+            conn.executemany("INSERT INTO llm_calls (at) VALUES (?)", [(now,)] * calls)
+            return True
+        finally:
+            conn.execute("COMMIT")
+
+    # --- OUTBOUND RATE LIMITS ---
+    def take_token(self, host, rate, burst):
+        """
+        Takes one token from host's bucket (rate tokens/s, at most burst), shared
+        by every worker. Returns 0, or the seconds until the next token is due.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(now - row[1], 0) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute("INSERT OR REPLACE INTO buckets (host, tokens, updated) VALUES (?, ?, ?)",
+                         (host, tokens, now))
+            return wait
+        finally:
+            conn.execute("COMMIT")
+
+    # --- PREFETCH BUDGET ---
+    def start_prefetch(self, host, key, per_minute, max_inflight, replacing=None, max_seconds=120):
+        """
+        Atomically charges one prefetch of key to host and marks key in flight,
+        across every worker. Returns "ok", or why not: "running" (key is already
+        in flight), "budget" (host started per_minute in the last minute) or
+        "inflight" (max_inflight already running; replacing, the job this one
+        supersedes, doesn't count). Entries older than max_seconds are taken to
+        be from a worker that died.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM prefetch_starts WHERE at < ?", (now - 60,))
+            conn.execute("DELETE FROM prefetch_inflight WHERE started < ?", (now - max_seconds,))
+            if conn.execute("SELECT 1 FROM prefetch_inflight WHERE key = ?", (key,)).fetchone():
+                return "running"
+            (started,) = conn.execute("SELECT COUNT(*) FROM prefetch_starts WHERE host = ?", (host,)).fetchone()
+            if started >= per_minute:
+                return "budget"
+            (inflight,) = conn.execute("SELECT COUNT(*) FROM prefetch_inflight WHERE key != ?",
+                                       (replacing or "",)).fetchone()
+            if inflight >= max_inflight:
+                return "inflight"
+            conn.execute("INSERT INTO prefetch_starts (host, at) VALUES (?, ?)", (host, now))
+            conn.execute("INSERT INTO prefetch_inflight (key, started) VALUES (?, ?)", (key, now))
+            return "ok"
+        finally:
+            conn.execute("COMMIT")
+
+    def end_prefetch(self, key):
+        self._conn().execute("DELETE FROM prefetch_inflight WHERE key = ?", (key,))
+
+    # --- SINGLE-FLIGHT ---
+    def try_lease(self, key, owner):
+        now = time.time()
+        conn = self._conn()
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+            (key, owner, now + self.lease_seconds),
+        )
+        if cur.rowcount:
+            return True
+        # Take over leases whose holder died without releasing them
+        cur = conn.execute(
+            "UPDATE leases SET owner = ?, expires = ? WHERE key = ? AND expires < ?",
+            (owner, now + self.lease_seconds, key, now),
+        )
+        return cur.rowcount > 0
+
+    def release(self, key, owner):
+        self._conn().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def _leased(self, key):
+        row = self._conn().execute(
+            "SELECT expires FROM leases WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def _renew(self, key, owner, stop):
+        """Heartbeat: keeps the holder's lease alive for as long as compute() runs."""
+        while not stop.wait(self.lease_seconds / 3):
+            self._conn().execute(
+                "UPDATE leases SET expires = ? WHERE key = ? AND owner = ?",
+                (time.time() + self.lease_seconds, key, owner),
+            )
+
+    def compute_leased(self, key, owner, compute):
+        """
+        Runs compute() for a lease owner already holds (see try_lease), renewing
+        the lease while it runs, then caches the result and releases the lease.
+        """
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._renew, args=(key, owner, stop), daemon=True)
+        heartbeat.start()
+        try:
+            value = compute()
+            self.set(key, value)
+            self._conn().execute("DELETE FROM diagrams WHERE key = ?", (FAILED_PREFIX + key,))
+            return value
+        except Exception as e:
+            # Written before the lease goes, so no waiter sees neither a result nor the failure
+            self.set(FAILED_PREFIX + key, {"error": str(e) or type(e).__name__})
+            raise
+        finally:
+            stop.set()
+            self.release(key, owner)
+
+    def _failure(self, key):
+        """The error of a build of key that failed within error_ttl, or None."""
+        hit = self.get(FAILED_PREFIX + key, max_age=self.error_ttl)
+        return hit[0]["error"] if hit else None
+
+    def single_flight(self, key, compute):
+        """
+        Returns the cached value for key, or computes it. Across all workers only
+        one caller runs compute() per key; the rest block until its result lands.
+        The lease is renewed while compute() runs, so a slow build is never
+        started a second time; it only expires if the holder dies. If the build
+        fails, callers get BuildFailed for error_ttl seconds instead of retrying.
+        """
+        owner = uuid.uuid4().hex
+        while True:
+            hit = self.get(key)
+            if hit:
+                return hit[0]
+            failure = self._failure(key)
+            if failure:
+                raise BuildFailed(failure)
+            if self.try_lease(key, owner):
+                return self.compute_leased(key, owner, compute)
+            # Someone else is generating it: wait for the result or for the lease to go away
+            while self._leased(key) and not self.get(key):
+                time.sleep(self.poll_interval)
+
+    async def single_flight_async(self, key, compute):
+        """
+        single_flight for the event loop: compute() (blocking) runs in a worker
+        thread, and callers waiting on another worker's build sleep on the loop
+        instead of each holding a threadpool thread.
+        """
+        owner = uuid.uuid4().hex
+        while True:
+            hit = self.get(key)
+            if hit:
+                return hit[0]
+            failure = self._failure(key)
+            if failure:
+                raise BuildFailed(failure)
+            if self.try_lease(key, owner):
+                return await asyncio.to_thread(self.compute_leased, key, owner, compute)
+            while self._leased(key) and not self.get(key):
+                await asyncio.sleep(self.poll_interval)
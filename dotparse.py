@@ -0,0 +1,289 @@
+"""
+Small pure-Python reader for the subset of Graphviz DOT that Gemini and the
+diagram scripts produce: nodes, edges (including chains and subgraph
+endpoints), attribute statements, clusters and comments.
+
+Anything it doesn't understand raises DotParseError so callers can fall back
+to the real graphviz binary. to_dot() writes a parsed graph back out (used to
+restyle laid-out graphs without laying them out again).
+"""
+import re
+
+
+class DotParseError(ValueError):
+    pass
+
+
+class HtmlLabel(str):
+    """An id that was written as <...> (an HTML-like label); kept so to_dot can write it back."""
+
+
+class DotGraph:
+    """Parsed DOT graph. Nodes keep insertion order, like graphviz does."""
+
+    def __init__(self, name="G", directed=True, strict=False):
+        self.name = name
+        self.directed = directed
+        self.strict = strict
+        self.attrs = {}
+        self.nodes = {}      # name -> attrs
+        self.edges = []      # (tail, head, attrs)
+        self.clusters = {}   # cluster name -> {"attrs": {...}, "nodes": [...]}
+        self.subgraphs = {}  # other (incl. anonymous) subgraph name -> attrs, e.g. rank=same
+        self.node_cluster = {}  # node name -> innermost cluster name
+
+    def add_node(self, name, attrs=None, cluster=None):
+        if name not in self.nodes:
+            self.nodes[name] = {}
+        if attrs:
+            self.nodes[name].update(attrs)
+        if cluster and name not in self.node_cluster:
+            self.node_cluster[name] = cluster
+            self.clusters[cluster]["nodes"].append(name)
+
+    def add_edge(self, tail, head, attrs):
+        if self.strict:
+            for t, h, a in self.edges:
+                if t == tail and h == head:
+                    a.update(attrs)
+                    return
+        self.edges.append((tail, head, dict(attrs)))
+
+
+# --- TOKENIZER ---
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/|^\#[^\n]*)
+  | (?P<edgeop>->|--)
+  | (?P<punct>[{}\[\];,=:])
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<html><)
+  | (?P<id>[A-Za-z_\u0080-\uffff][A-Za-z0-9_\u0080-\uffff]*|-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?))
+""", re.VERBOSE | re.DOTALL | re.MULTILINE)
+
+_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+
+def _read_html(text, pos):
+    """Returns (html_string, end) for a <...> id starting at pos."""
+    depth = 0
+    i = pos
+    while i < len(text):
+        if text[i] == "<":
+            depth += 1
+        elif text[i] == ">":
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:i], i + 1
+        i += 1
+    raise DotParseError("unterminated HTML label")
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise DotParseError(f"unexpected character {text[pos]!r} at {pos}")
+        kind = m.lastgroup
+        if kind == "html":
+            value, pos = _read_html(text, pos)
+            tokens.append(("id", HtmlLabel(value)))
+            continue
+        pos = m.end()
+        if kind in ("ws", "comment"):
+            continue
+        value = m.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace('\\"', '"').replace("\\\n", "")
+            tokens.append(("id", value))
+        elif kind == "id":
+            lower = value.lower()
+            tokens.append(("kw", lower) if lower in _KEYWORDS else ("id", value))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+
+# --- PARSER ---
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+        self.graph = None
+        self._anon = 0
+
+    def peek(self, offset=0):
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        tok = self.peek()
+        if tok[0] is None or (kind and tok[0] != kind) or (value and tok[1] != value):
+            raise DotParseError(f"expected {value or kind}, got {tok[1]!r}")
+        self.i += 1
+        return tok
+
+    def accept(self, kind, value=None):
+        tok = self.peek()
+        if tok[0] == kind and (value is None or tok[1] == value):
+            self.i += 1
+            return tok
+        return None
+
+    def parse(self):
+        strict = bool(self.accept("kw", "strict"))
+        kind = self.take("kw")[1]
+        if kind not in ("graph", "digraph"):
+            raise DotParseError("expected graph or digraph")
+        name = "G"
+        if self.peek()[0] == "id":
+            name = self.take("id")[1]
+        self.graph = DotGraph(name, directed=(kind == "digraph"), strict=strict)
+        scope = {"node": {}, "edge": {}, "cluster": None, "members": []}
+        self.take("punct", "{")
+        self.stmt_list(scope, self.graph.attrs)
+        self.take("punct", "}")
+        return self.graph
+
+    def stmt_list(self, scope, graph_attrs):
+        while self.peek() != ("punct", "}"):
+            if self.peek()[0] is None:
+                raise DotParseError("unexpected end of input")
+            self.stmt(scope, graph_attrs)
+            self.accept("punct", ";")
+
+    def attr_list(self):
+        attrs = {}
+        while self.accept("punct", "["):
+            while not self.accept("punct", "]"):
+                key = self.take("id")[1]
+                if self.accept("punct", "="):
+                    attrs[key] = self.take("id")[1]
+                else:
+                    attrs[key] = "true"
+                self.accept("punct", ",") or self.accept("punct", ";")
+        return attrs
+
+    def stmt(self, scope, graph_attrs):
+        tok = self.peek()
+        if tok[0] == "kw" and tok[1] in ("graph", "node", "edge"):
+            self.i += 1
+            attrs = self.attr_list()
+            if tok[1] == "graph":
+                graph_attrs.update(attrs)
+            else:
+                scope[tok[1]].update(attrs)
+            return
+        if tok[0] == "id" and self.peek(1) == ("punct", "="):
+            key = self.take("id")[1]
+            self.take("punct", "=")
+            graph_attrs[key] = self.take("id")[1]
+            return
+
+        endpoint = self.endpoint(scope)
+        if self.peek()[0] == "edgeop":
+            chain = [endpoint]
+            while self.accept("edgeop"):
+                chain.append(self.endpoint(scope))
+            attrs = dict(scope["edge"])
+            attrs.update(self.attr_list())
+            for tails, heads in zip(chain, chain[1:]):
+                for t in tails:
+                    for h in heads:
+                        self.graph.add_edge(t, h, attrs)
+        elif self.tokens[self.i - 1][0] == "id":
+            # plain node statement; endpoint() already applied the defaults
+            self.graph.add_node(endpoint[0], self.attr_list())
+
+    def endpoint(self, scope):
+        """Returns the list of node names for a node id or a subgraph."""
+        tok = self.peek()
+        if tok == ("kw", "subgraph") or tok == ("punct", "{"):
+            return self.subgraph(scope)
+        name = self.take("id")[1]
+        if self.accept("punct", ":"):
+            self.take("id")
+            if self.accept("punct", ":"):
+                self.take("id")
+        if name not in self.graph.nodes:
+            self.graph.add_node(name, dict(scope["node"]), scope["cluster"])
+        elif scope["cluster"]:
+            self.graph.add_node(name, None, scope["cluster"])
+        for members in scope["members"]:
+            if name not in members:
+                members.append(name)
+        return [name]
+
+    def subgraph(self, scope):
+        name = None
+        if self.accept("kw", "subgraph") and self.peek()[0] == "id":
+            name = self.take("id")[1]
+        if name is None:
+            self._anon += 1
+            name = f"%anon{self._anon}"
+        members = []
+        inner = {
+            "node": dict(scope["node"]),
+            "edge": dict(scope["edge"]),
+            "cluster": scope["cluster"],
+            "members": scope["members"] + [members],
+        }
+        if name.startswith("cluster"):
+            self.graph.clusters.setdefault(name, {"attrs": {}, "nodes": []})
+            attrs = self.graph.clusters[name]["attrs"]
+            inner["cluster"] = name
+        else:
+            attrs = self.graph.subgraphs.setdefault(name, {})
+        self.take("punct", "{")
+        self.stmt_list(inner, attrs)
+        self.take("punct", "}")
+        return members
+
+
+# --- WRITER ---
+def _quote(value):
+    if isinstance(value, HtmlLabel):
+        return f"<{value}>"
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def _attr_list(attrs):
+    return "[" + ", ".join(f"{k}={_quote(v)}" for k, v in attrs.items()) + "]"
+
+
+def to_dot(graph):
+    """
+    DOT source for a DotGraph. Every node and edge carries its full attribute
+    set; clusters are written flat (each node in its innermost cluster), which
+    is all a pinned-position render (neato -n2) needs.
+    """
+    edgeop = "->" if graph.directed else "--"
+    lines = [f"{'strict ' if graph.strict else ''}{'digraph' if graph.directed else 'graph'} {_quote(graph.name)} {{"]
+    if graph.attrs:
+        lines.append(f"\tgraph {_attr_list(graph.attrs)};")
+    for name, cluster in graph.clusters.items():
+        lines.append(f"\tsubgraph {_quote(name)} {{")
+        if cluster["attrs"]:
+            lines.append(f"\t\tgraph {_attr_list(cluster['attrs'])};")
+        for node in cluster["nodes"]:
+            lines.append(f"\t\t{_quote(node)} {_attr_list(graph.nodes[node])};")
+        lines.append("\t}")
+    for node, attrs in graph.nodes.items():
+        if node not in graph.node_cluster:
+            lines.append(f"\t{_quote(node)} {_attr_list(attrs)};")
+    for tail, head, attrs in graph.edges:
+        lines.append(f"\t{_quote(tail)} {edgeop} {_quote(head)} {_attr_list(attrs)};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_dot(text):
+    """Parses DOT source into a DotGraph. Raises DotParseError on anything unsupported."""
+    tokens = tokenize(text)
+    parser = _Parser(tokens)
+    graph = parser.parse()
+    if parser.i != len(tokens):
+        raise DotParseError(f"trailing content after graph: {tokens[parser.i][1]!r}")
+    return graph
@@ -0,0 +1,428 @@
+"""
+In-process layered (Sugiyama-style) layout for small graphs.
+
+Produces the same JSON shape that `graphviz.Source(...).pipe(format='json')`
+returns (objects with `pos` in points, y axis pointing up, edges with
+`tail`/`head` indexes and a `pos` spline), so `parse_graphviz_to_reactflow`
+can consume either one. For the 10-30 node graphs Gemini returns this is
+much cheaper than starting a `dot` process.
+"""
+from dotparse import DotParseError, parse_dot
+
+# Graphviz defaults, in points
+NODESEP = 18.0
+RANKSEP = 36.0
+MIN_WIDTH = 54.0
+MIN_HEIGHT = 36.0
+FONTSIZE = 14.0
+MARGIN = 4.0
+
+ORDER_SWEEPS = 8
+TRANSPOSE_PASSES = 4
+# Long edges are split into one dummy node per rank they skip; past this many the
+# ordering work grows faster than a `dot` process costs, so callers should use graphviz
+MAX_DUMMY_NODES = 200
+
+
+def _label_lines(name, attrs):
+    label = attrs.get("label", name)
+    if label == "\\N" or not label.strip():
+        label = name
+    for esc in ("\\n", "\\l", "\\r"):
+        label = label.replace(esc, "\n")
+    return label.split("\n")
+
+
+def _node_size(name, attrs):
+    """Estimates the node box the way graphviz sizes it around its label."""
+    fontsize = float(attrs.get("fontsize", FONTSIZE))
+    lines = _label_lines(name, attrs)
+    text_w = max(len(line) for line in lines) * fontsize * 0.55
+    text_h = len(lines) * fontsize * 1.2
+    w = max(float(attrs.get("width", MIN_WIDTH / 72)) * 72, text_w + 16)
+    h = max(float(attrs.get("height", MIN_HEIGHT / 72)) * 72, text_h + 8)
+    if attrs.get("shape") in ("circle", "doublecircle", "point"):
+        w = h = max(w, h)
+    return w, h
+
+
+class LayoutTooLarge(ValueError):
+    """The graph is too big or too long-edged for the in-process layout; use graphviz."""
+
+
+# --- 1. CYCLE REMOVAL ---
+def _acyclic_edges(names, edges):
+    """Reverses DFS back edges. Returns [(tail, head, reversed)] without self loops."""
+    succ = {n: [] for n in names}
+    for t, h in edges:
+        if t != h:
+            succ[t].append(h)
+
+    state = {}
+    back = set()
+    for root in names:
+        if root in state:
+            continue
+        stack = [(root, iter(succ[root]))]
+        state[root] = 1
+        while stack:
+            node, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                back.add((node, nxt))
+            elif nxt not in state:
+                state[nxt] = 1
+                stack.append((nxt, iter(succ[nxt])))
+
+    result = []
+    for t, h in edges:
+        if t == h:
+            continue
+        if (t, h) in back:
+            result.append((h, t, True))
+        else:
+            result.append((t, h, False))
+    return result
+
+
+# --- 2. LAYERING ---
+def _assign_ranks(names, dag):
+    preds = {n: [] for n in names}
+    succs = {n: [] for n in names}
+    for t, h, _ in dag:
+        preds[h].append(t)
+        succs[t].append(h)
+
+    # Longest path from the sources, in topological order
+    indeg = {n: len(preds[n]) for n in names}
+    queue = [n for n in names if indeg[n] == 0]
+    rank = {n: 0 for n in names}
+    order = []
+    while queue:
+        n = queue.pop(0)
+        order.append(n)
+        for s in succs[n]:
+            rank[s] = max(rank[s], rank[n] + 1)
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                queue.append(s)
+
+    # Pull nodes down next to their successors (shortens source edges like dot does)
+    for n in reversed(order):
+        if succs[n]:
+            rank[n] = max(rank[n], min(rank[s] for s in succs[n]) - 1)
+    return rank
+
+
+# --- 3. ORDERING ---
+def _crossings_between(upper, lower, links):
+    """
+    Counts crossings between two adjacent layers: the inversions among the
+    links' lower positions once they are sorted by upper position (Fenwick tree,
+    O(E log V) instead of comparing every pair of links).
+    """
+    pos = {n: i for i, n in enumerate(lower)}
+    upos = {n: i for i, n in enumerate(upper)}
+    pairs = sorted((upos[u], pos[v]) for u, v in links if u in upos and v in pos)
+    tree = [0] * (len(lower) + 1)
+    count = 0
+    for seen, (_, v) in enumerate(pairs):
+        # Links already seen whose lower end lies strictly right of v cross this one
+        i, not_right = v + 1, 0
+        while i > 0:
+            not_right += tree[i]
+            i -= i & -i
+        count += seen - not_right
+        i = v + 1
+        while i <= len(lower):
+            tree[i] += 1
+            i += i & -i
+    return count
+
+
+def _links_by_layer(layers, links):
+    """links[r]: the links from layer r down to layer r + 1."""
+    rank = {n: r for r, layer in enumerate(layers) for n in layer}
+    by_layer = [[] for _ in layers]
+    for u, v in links:
+        by_layer[rank[u]].append((u, v))
+    return by_layer
+
+
+def count_crossings(layers, links):
+    """Total crossings of a layered graph; links are (upper_node, lower_node) pairs."""
+    by_layer = _links_by_layer(layers, links)
+    return sum(_crossings_between(layers[r], layers[r + 1], by_layer[r]) for r in range(len(layers) - 1))
+
+
+def _order_layers(layers, links, cluster_of):
+    up = {}
+    down = {}
+    for u, v in links:
+        down.setdefault(u, []).append(v)
+        up.setdefault(v, []).append(u)
+    by_layer = _links_by_layer(layers, links)
+
+    def total(layers):
+        return sum(_crossings_between(layers[r], layers[r + 1], by_layer[r]) for r in range(len(layers) - 1))
+
+    def sweep(layers, downward):
+        rng = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for r in rng:
+            ref = layers[r - 1] if downward else layers[r + 1]
+            ref_pos = {n: i for i, n in enumerate(ref)}
+            nbrs = up if downward else down
+            current = {n: i for i, n in enumerate(layers[r])}
+
+            def bary(n):
+                ps = [ref_pos[m] for m in nbrs.get(n, []) if m in ref_pos]
+                return sum(ps) / len(ps) if ps else current[n]
+
+            keyed = {n: bary(n) for n in layers[r]}
+            # Keep clusters contiguous: order groups by their mean barycenter
+            groups = {}
+            for n in layers[r]:
+                groups.setdefault(cluster_of.get(n, n), []).append(n)
+            group_key = {g: sum(keyed[n] for n in ns) / len(ns) for g, ns in groups.items()}
+            layers[r] = sorted(layers[r], key=lambda n: (group_key[cluster_of.get(n, n)], keyed[n]))
+
+    best = [list(layer) for layer in layers]
+    best_cross = total(best)
+    for i in range(ORDER_SWEEPS):
+        if best_cross == 0:
+            break
+        sweep(layers, downward=(i % 2 == 0))
+        cross = total(layers)
+        if cross < best_cross:
+            best, best_cross = [list(layer) for layer in layers], cross
+
+    # Transpose: swap neighbours while that lowers their crossings (a few passes at most).
+    # Only the two nodes' own links change order, so compare just those.
+    def pair_crossings(a, b, r):
+        """(crossings with a left of b, crossings with b left of a) among a's and b's links."""
+        keep = swap = 0
+        for nbrs, ref in ((up, r - 1), (down, r + 1)):
+            if not 0 <= ref < len(best):
+                continue
+            pos = positions[ref]
+            for pa in nbrs.get(a, []):
+                for pb in nbrs.get(b, []):
+                    keep += pos[pa] > pos[pb]
+                    swap += pos[pa] < pos[pb]
+        return keep, swap
+
+    positions = [{n: i for i, n in enumerate(layer)} for layer in best]
+    improved = True
+    passes = 0
+    while improved and best_cross and passes < TRANSPOSE_PASSES:
+        improved = False
+        passes += 1
+        for r, layer in enumerate(best):
+            for i in range(len(layer) - 1):
+                a, b = layer[i], layer[i + 1]
+                if cluster_of.get(a, a) != cluster_of.get(b, b) and (a in cluster_of or b in cluster_of):
+                    continue
+                keep, swap = pair_crossings(a, b, r)
+                if swap < keep:
+                    layer[i], layer[i + 1] = b, a
+                    positions[r][a], positions[r][b] = i + 1, i
+                    improved = True
+        best_cross = total(best)
+    return best
+
+
+# --- 4. COORDINATES ---
+def _median(values, default):
+    if not values:
+        return default
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def _place(layers, links, breadth, gap, iterations=6):
+    """Assigns in-layer coordinates (centers) by pulling nodes towards their neighbours."""
+    up = {}
+    down = {}
+    for u, v in links:
+        down.setdefault(u, []).append(v)
+        up.setdefault(v, []).append(u)
+
+    coord = {}
+    for layer in layers:
+        x = 0.0
+        for n in layer:
+            coord[n] = x + breadth[n] / 2
+            x += breadth[n] + gap
+
+    def min_sep(a, b):
+        return (breadth[a] + breadth[b]) / 2 + gap
+
+    for it in range(iterations):
+        downward = it % 2 == 0
+        rng = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for r in rng:
+            layer = layers[r]
+            nbrs = up if downward else down
+            desired = [_median([coord[m] for m in nbrs.get(n, [])], coord[n]) for n in layer]
+            fwd = list(desired)
+            for i in range(1, len(layer)):
+                fwd[i] = max(fwd[i], fwd[i - 1] + min_sep(layer[i - 1], layer[i]))
+            bwd = list(desired)
+            for i in range(len(layer) - 2, -1, -1):
+                bwd[i] = min(bwd[i], bwd[i + 1] - min_sep(layer[i], layer[i + 1]))
+            final = [(a + b) / 2 for a, b in zip(fwd, bwd)]
+            for i in range(1, len(layer)):
+                final[i] = max(final[i], final[i - 1] + min_sep(layer[i - 1], layer[i]))
+            for n, x in zip(layer, final):
+                coord[n] = x
+
+    lo = min(coord[n] - breadth[n] / 2 for layer in layers for n in layer)
+    for n in coord:
+        coord[n] -= lo
+    return coord
+
+
+def _spline(points):
+    """Graphviz-style bspline string through the given points (straight cubic pieces)."""
+    ctrl = [points[0]]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        ctrl.append((x0 + (x1 - x0) / 3, y0 + (y1 - y0) / 3))
+        ctrl.append((x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3))
+        ctrl.append((x1, y1))
+    return " ".join(f"{x:.2f},{y:.2f}" for x, y in ctrl)
+
+
+def _unsupported(graph):
+    """A layout constraint this layout doesn't model (graphviz has to honour it), or None."""
+    scopes = [graph.attrs] + [c["attrs"] for c in graph.clusters.values()] + list(graph.subgraphs.values())
+    if any("rank" in attrs for attrs in scopes):
+        return "rank="
+    if any("constraint" in attrs for _, _, attrs in graph.edges):
+        return "constraint="
+    return None
+
+
+def layered_layout(graph):
+    """
+    Lays out a DotGraph and returns graphviz `-Tjson`-shaped layout data.
+    Raises DotParseError for rank= / constraint=, which only graphviz honours.
+    """
+    unsupported = _unsupported(graph)
+    if unsupported:
+        raise DotParseError(f"{unsupported} needs graphviz")
+    names = list(graph.nodes)
+    rankdir = graph.attrs.get("rankdir", "TB").upper()
+    horizontal = rankdir in ("LR", "RL")
+    nodesep = float(graph.attrs.get("nodesep", NODESEP / 72)) * 72
+    ranksep = float(str(graph.attrs.get("ranksep", RANKSEP / 72)).split()[0]) * 72
+
+    sizes = {n: _node_size(n, graph.nodes[n]) for n in names}
+    raw_edges = [(t, h) for t, h, _ in graph.edges]
+    dag = _acyclic_edges(names, raw_edges)
+    rank = _assign_ranks(names, dag)
+
+    # Split long edges with dummy nodes so every link spans one rank
+    links = []
+    chains = []
+    dummy = 0
+    for t, h, rev in dag:
+        chain = [t]
+        for r in range(rank[t] + 1, rank[h]):
+            dummy += 1
+            d = f"%dummy{dummy}"
+            rank[d] = r
+            sizes[d] = (0.0, 0.0)
+            chain.append(d)
+        chain.append(h)
+        links.extend(zip(chain, chain[1:]))
+        chains.append(chain[::-1] if rev else chain)
+    if dummy > MAX_DUMMY_NODES:
+        raise LayoutTooLarge(f"{dummy} dummy nodes (limit {MAX_DUMMY_NODES})")
+
+    n_ranks = max(rank.values(), default=-1) + 1
+    layers = [[] for _ in range(n_ranks)]
+    for n in names:
+        layers[rank[n]].append(n)
+    for d in sorted((n for n in rank if n not in graph.nodes), key=lambda d: int(d[6:])):
+        layers[rank[d]].append(d)
+
+    layers = _order_layers(layers, links, graph.node_cluster)
+
+    # Breadth runs along a layer, depth across layers; LR swaps the two axes
+    breadth = {n: (sizes[n][1] if horizontal else sizes[n][0]) for n in rank}
+    depth = {n: (sizes[n][0] if horizontal else sizes[n][1]) for n in rank}
+    along = _place(layers, links, breadth, nodesep)
+
+    across = {}
+    offset = 0.0
+    for layer in layers:
+        thick = max((depth[n] for n in layer), default=0.0)
+        for n in layer:
+            across[n] = offset + thick / 2
+        offset += thick + ranksep
+    total_depth = max(offset - ranksep, 0.0)
+    total_breadth = max((along[n] + breadth[n] / 2 for n in along), default=0.0)
+
+    def point(n):
+        a, c = along[n], across[n]
+        if rankdir == "BT":
+            c = total_depth - c
+        if rankdir == "RL":
+            c = total_depth - c
+        if horizontal:
+            x, y = c, total_breadth - a
+        else:
+            x, y = a, total_depth - c
+        return x + MARGIN, y + MARGIN
+
+    width = (total_depth if horizontal else total_breadth) + 2 * MARGIN
+    height = (total_breadth if horizontal else total_depth) + 2 * MARGIN
+
+    objects = []
+    index = {}
+    for i, n in enumerate(names):
+        x, y = point(n)
+        w, h = sizes[n]
+        obj = dict(graph.nodes[n])
+        obj.update({
+            "_gvid": i,
+            "name": n,
+            "pos": f"{x:.2f},{y:.2f}",
+            "width": f"{w / 72:.3f}",
+            "height": f"{h / 72:.3f}",
+        })
+        objects.append(obj)
+        index[n] = i
+
+    out_edges = []
+    chain_iter = iter(chains)
+    for i, (t, h, attrs) in enumerate(graph.edges):
+        edge = dict(attrs)
+        edge.update({"_gvid": i, "tail": index[t], "head": index[h]})
+        if t == h:
+            x, y = point(t)
+            w, hh = sizes[t]
+            loop = [(x + w / 2, y), (x + w / 2 + 18, y + hh / 2), (x + w / 2 + 18, y - hh / 2), (x + w / 2, y)]
+            edge["pos"] = " ".join(f"{px:.2f},{py:.2f}" for px, py in loop)
+        else:
+            edge["pos"] = _spline([point(n) for n in next(chain_iter)])
+        out_edges.append(edge)
+
+    return {
+        "name": graph.name,
+        "directed": graph.directed,
+        "strict": graph.strict,
+        "bb": f"0,0,{width:.2f},{height:.2f}",
+        "objects": objects,
+        "edges": out_edges,
+    }
+
+
+def layout_dot_source(dot_code):
+    """Parses and lays out DOT source. Raises DotParseError if the source is unsupported."""
+    return layered_layout(parse_dot(dot_code))
+
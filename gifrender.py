@@ -0,0 +1,541 @@
+"""
+Shared rendering helpers for the animated diagrams (animate.py and the
+hldgif.py / uberhldgif.py / uberlldgif.py wrappers).
+"""
+import io
+import json
+import math
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import imageio.v2 as imageio
+    import imageio_ffmpeg  # noqa: F401 (MP4 backend for imageio)
+except ImportError:
+    imageio_ffmpeg = None
+
+
+def default_workers():
+    return int(os.getenv("GIF_WORKERS", os.cpu_count() or 1))
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def report_rss(stage):
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"📈 Peak RSS {stage}: {peak:.1f} MB")
+
+
+def render_frames(generate_frame, count, workers=None):
+    """
+    Yields generate_frame(0) ... generate_frame(count - 1) in order.
+
+    Frames are rendered in a process pool (each one is a separate graphviz
+    run, so this scales with cores). At most `workers * 2` frames are in
+    flight, so the writer never has to hold the whole animation.
+    """
+    return render_jobs(generate_frame, range(count), workers)
+
+
+def render_jobs(render, jobs, workers=None, mp_context=None):
+    """
+    Like render_frames, but yields render(job) for each job in a list.
+    mp_context: how worker processes start (pass the "spawn" context from a
+    threaded process such as the server, where forking is unsafe).
+    """
+    jobs = list(jobs)
+    workers = min(workers or default_workers(), len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            yield render(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        pending = deque()
+        next_index = 0
+        while next_index < len(jobs) or pending:
+            while next_index < len(jobs) and len(pending) < workers * 2:
+                pending.append(pool.submit(render, jobs[next_index]))
+                next_index += 1
+            yield pending.popleft().result()
+
+
+# --- LAYOUT ONCE ---
+def compute_layout(dot):
+    """
+    Runs the graphviz layout once and returns what every frame reuses: node
+    positions, edge routes and label positions (all in points), plus the
+    bounding box. Edges are listed in the order they were added.
+    """
+    data = json.loads(dot.pipe(format='json'))
+    nodes = {obj['name']: obj['pos'] for obj in data.get('objects', []) if 'pos' in obj}
+    edges = []
+    for edge in sorted(data.get('edges', []), key=lambda e: e['_gvid']):
+        edges.append({key: edge[key] for key in ('pos', 'lp', 'xlp') if key in edge})
+    return {"bb": data['bb'], "nodes": nodes, "edges": edges}
+
+
+def node_pos(layout, node_id, default):
+    """The node's computed position when rendering from a layout, else its authored pos."""
+    return layout['nodes'][node_id] if layout else default
+
+
+def edge_route(layout, index):
+    """Extra edge attributes that pin an edge to its precomputed route."""
+    return layout['edges'][index] if layout else {}
+
+
+def pipe_frame(dot, layout):
+    """Renders a frame; with a layout, neato -n2 only draws (no layout, no edge routing)."""
+    if layout:
+        dot.attr(bb=layout['bb'])
+        return dot.pipe(neato_no_op=2)
+    return dot.pipe()
+
+
+# --- MEMORY BUDGET ---
+# Rough bytes held per output pixel while encoding: the base and working frames
+# (RGB), one highlight layer as Pillow decodes it (RGBA) and the palette indexes
+BYTES_PER_PIXEL = 16
+# Row strips of about this many pixels bound the temporaries of whole-frame numpy work
+TILE_PIXELS = 1 << 20
+DEFAULT_DPI = 96  # graphviz's own default for bitmap output
+GRAPHVIZ_PAD_PT = 8  # default pad, 4pt on each side
+
+
+def pixel_budget(max_pixels=None, max_memory_mb=None):
+    """
+    Largest frame, in pixels, that rendering may produce. Defaults come from
+    RENDER_MAX_PIXELS and RENDER_MAX_MEMORY_MB (512 MB); the tighter one wins.
+    """
+    if max_pixels is None:
+        max_pixels = int(os.getenv("RENDER_MAX_PIXELS", 0)) or None
+    if max_memory_mb is None:
+        max_memory_mb = float(os.getenv("RENDER_MAX_MEMORY_MB", 512))
+    by_memory = int(max_memory_mb * 1024 * 1024 / BYTES_PER_PIXEL)
+    return min(max_pixels, by_memory) if max_pixels else by_memory
+
+
+_pixel_limits = []
+_pixel_limits_lock = threading.Lock()
+
+
+@contextmanager
+def pixel_limit(limit):
+    """
+    Raises PIL's decompression-bomb guard to at least `limit` pixels for the
+    duration, then puts it back. PIL only has the one global, so overlapping
+    renders in threads share it: the largest limit still in use wins.
+    """
+    with _pixel_limits_lock:
+        if not _pixel_limits:
+            _pixel_limits.append(Image.MAX_IMAGE_PIXELS)  # the original, restored last
+        _pixel_limits.append(limit)
+        Image.MAX_IMAGE_PIXELS = None if _pixel_limits[0] is None else max(_pixel_limits)
+    try:
+        yield
+    finally:
+        with _pixel_limits_lock:
+            _pixel_limits.remove(limit)
+            if len(_pixel_limits) == 1:
+                Image.MAX_IMAGE_PIXELS = _pixel_limits.pop()
+            elif _pixel_limits[0] is not None:
+                Image.MAX_IMAGE_PIXELS = max(_pixel_limits)
+
+
+def frame_size(bb, dpi):
+    """Pixel size graphviz will produce for a layout bounding box (points) at dpi."""
+    x0, y0, x1, y1 = (float(v) for v in bb.split(','))
+    scale = float(dpi) / 72
+    return (math.ceil((x1 - x0 + GRAPHVIZ_PAD_PT) * scale),
+            math.ceil((y1 - y0 + GRAPHVIZ_PAD_PT) * scale))
+
+
+def choose_dpi(bb, max_pixels, width=None, dpi=None):
+    """
+    DPI to rasterize a layout at: the requested dpi (graphviz's 96 by default),
+    lowered until the frame is at most `width` pixels wide and `max_pixels` in
+    area. Graphviz then renders at that size directly, nothing is downscaled.
+    """
+    w, h = frame_size(bb, 72)
+    limits = []
+    if width:
+        limits.append(72 * width / w)
+    if max_pixels:
+        limits.append(72 * math.sqrt(max_pixels / (w * h)))
+    # Limits round down, with a little slack for graphviz's own rounding
+    return min([float(dpi or DEFAULT_DPI)] + [math.floor(d * 0.99 * 10) / 10 for d in limits])
+
+
+# --- DELTA COMPOSITING ---
+def decode(png, mode='RGB'):
+    with Image.open(io.BytesIO(png)) as img:
+        return np.asarray(img.convert(mode))
+
+
+def _untimed(stage):
+    return nullcontext()
+
+
+def decode_layer(png, stage=_untimed):
+    """
+    The visible part of a transparent highlight layer as (RGBA array, box), or
+    (None, None) when it is empty. Only the box is copied into numpy.
+    """
+    with Image.open(io.BytesIO(png)) as img:
+        with stage("decode"):
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            box = img.getbbox()
+        if box is None:
+            return None, None
+        with stage("numpy"):
+            return np.asarray(img.crop(box)), box
+
+
+def fit_canvas(png, size, background):
+    """Decodes a frame and centers it on a fixed-size canvas (cropping if it is larger)."""
+    with Image.open(io.BytesIO(png)) as img:
+        img = img.convert('RGBA')
+        canvas = Image.new('RGBA', size, background + (255,))
+        canvas.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2), img)
+        return np.asarray(canvas.convert('RGB'))
+
+
+def _bbox(mask):
+    """(x0, y0, x1, y1) of the True pixels in a 2D mask, or None."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _clip(box, frame):
+    h, w = frame.shape[:2]
+    x0, y0, x1, y1 = box
+    box = (min(x0, w), min(y0, h), min(x1, w), min(y1, h))
+    return box if box[0] < box[2] and box[1] < box[3] else None
+
+
+def _union(a, b):
+    if a is None or b is None:
+        return a or b
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _rows(height, width):
+    step = max(1, TILE_PIXELS // max(1, width))
+    for y in range(0, height, step):
+        yield slice(y, min(y + step, height))
+
+
+def compose(frame, layer, box):
+    """Alpha-blends an RGBA layer crop into the RGB frame at box (inside the frame), in place and in row strips."""
+    x0, y0, x1, y1 = box
+    layer = layer[:y1 - y0, :x1 - x0]
+    dst = frame[y0:y1, x0:x1]
+    for rows in _rows(*layer.shape[:2]):
+        src = layer[rows]
+        alpha = src[..., 3:4].astype(np.uint16)
+        dst[rows] = ((src[..., :3] * alpha + dst[rows] * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+
+# --- PALETTE ---
+def hex_to_rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class Palette:
+    """
+    One palette for a whole animation, so colors don't flicker between
+    frames, plus a 64x64x64 lookup table for vectorized RGB -> index mapping.
+    """
+    LUT_BITS = 6
+
+    def __init__(self, colors, exact=()):
+        self.colors = np.array(colors[:256], dtype=np.uint8)
+        self.flat = self.colors.flatten().tolist()
+        self.image = Image.new('P', (1, 1))
+        self.image.putpalette(self.flat)
+        self._exact = list(exact)
+        self._lut = None
+
+    @classmethod
+    def from_theme(cls, theme_colors, sample=None, size=256):
+        """
+        Exact theme colors first (first one = background), then the anti-aliasing
+        blends between the background and each of them, then adaptive colors from
+        a sample frame to cover whatever else the renderer drew.
+        """
+        fixed = list(dict.fromkeys(hex_to_rgb(c) for c in theme_colors))
+        colors = list(fixed)
+        if fixed:
+            bg = np.array(fixed[0], dtype=np.float32)
+            for color in fixed[1:]:
+                for t in (0.25, 0.5, 0.75):
+                    colors.append(tuple(int(v) for v in np.rint(bg + (np.array(color) - bg) * t)))
+        colors = list(dict.fromkeys(colors))[:size]
+        if sample is not None and len(colors) < size:
+            # A strided sample is plenty to find the colors and keeps huge frames cheap
+            step = math.ceil(math.sqrt(sample.shape[0] * sample.shape[1] / TILE_PIXELS))
+            sample = np.ascontiguousarray(sample[::step, ::step])
+            quantized = Image.fromarray(sample).quantize(size - len(colors), method=Image.Quantize.MEDIANCUT)
+            pal = quantized.getpalette()
+            used = [i for i, count in enumerate(quantized.histogram()) if count]
+            colors += [tuple(pal[i * 3:i * 3 + 3]) for i in used]
+            colors = list(dict.fromkeys(colors))[:size]
+        return cls(colors, exact=fixed)
+
+    def _build_lut(self):
+        bits = self.LUT_BITS
+        shift = 8 - bits
+        steps = (np.arange(1 << bits, dtype=np.int32) << shift) + (1 << shift >> 1)
+        grid = np.stack(np.meshgrid(steps, steps, steps, indexing='ij'), axis=-1).reshape(-1, 3)
+        pal = self.colors.astype(np.int32)
+        lut = np.empty(len(grid), dtype=np.uint8)
+        for start in range(0, len(grid), 4096):
+            chunk = grid[start:start + 4096]
+            dist = ((chunk[:, None, :] - pal[None, :, :]) ** 2).sum(axis=2)
+            lut[start:start + 4096] = dist.argmin(axis=1)
+        # Theme colors must come out exactly, not as a neighbouring palette entry
+        for i, color in enumerate(self.colors.tolist()):
+            if tuple(color) in self._exact:
+                lut[self._index(np.array([color], dtype=np.uint8))[0]] = i
+        self._lut = lut
+
+    def _index(self, rgb):
+        shift = 8 - self.LUT_BITS
+        rgb = rgb >> shift
+        return (rgb[..., 0].astype(np.int32) << (2 * self.LUT_BITS)) | \
+               (rgb[..., 1].astype(np.int32) << self.LUT_BITS) | rgb[..., 2]
+
+    def map(self, rgb):
+        """Palette indexes (uint8, HxW) for an RGB array, mapped in row strips."""
+        if self._lut is None:
+            self._build_lut()
+        out = np.empty(rgb.shape[:2], dtype=np.uint8)
+        for rows in _rows(*rgb.shape[:2]):
+            out[rows] = self._lut[self._index(rgb[rows])]
+        return out
+
+    def to_image(self, rgb):
+        im = Image.fromarray(self.map(rgb), 'P')
+        im.putpalette(self.flat)
+        return im
+
+
+# --- WRITERS ---
+class DeltaGifWriter:
+    """
+    Streams equal-sized RGB frames into a GIF. After the first frame, each
+    frame is stored as just the box that changed since the previous one
+    (disposal 1, so earlier pixels stay on screen); identical frames are
+    merged into one longer frame. All frames share one global palette.
+    """
+
+    def __init__(self, path, fps, loop=0, palette=None, theme_colors=()):
+        self.path = path
+        self.duration = 1000 / fps
+        self.loop = loop
+        self.palette = palette  # Palette; built from the theme + first frame if not given
+        self.theme_colors = theme_colors
+        self._fp = None
+        self._prev = None
+        self._pending = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, frame, delta=None):
+        """
+        delta: (region, before) when the caller reuses one frame buffer --
+        region bounds every change since the previous frame (None: no change)
+        and before holds what the previous frame had there.
+        """
+        if self._fp is None:
+            if self.palette is None:
+                self.palette = Palette.from_theme(self.theme_colors, sample=frame)
+            im = self.palette.to_image(frame)
+            header, _ = GifImagePlugin.getheader(im, info={"loop": self.loop, "duration": self.duration})
+            self._fp = open(self.path, 'wb')
+            self._fp.writelines(header)
+            self._pending = [im, (0, 0), self.duration]
+        else:
+            if delta is not None:
+                region, before = delta
+            elif self._prev is not None:
+                region, before = (0, 0, frame.shape[1], frame.shape[0]), self._prev
+            else:
+                region, before = (0, 0, frame.shape[1], frame.shape[0]), None
+            box = None
+            if region is not None:
+                x0, y0, x1, y1 = region
+                box = (0, 0, x1 - x0, y1 - y0) if before is None else \
+                    _bbox(np.any(frame[y0:y1, x0:x1] != before, axis=2))
+            if box is None:
+                self._pending[2] += self.duration
+            else:
+                self._flush()
+                bx0, by0, bx1, by1 = box
+                crop = frame[y0 + by0:y0 + by1, x0 + bx0:x0 + bx1]
+                self._pending = [self.palette.to_image(crop), (x0 + bx0, y0 + by0), self.duration]
+        # A reused buffer is no reference for the next frame; the caller passes delta instead
+        self._prev = frame if delta is None else None
+
+    def _flush(self):
+        if self._pending:
+            im, offset, duration = self._pending
+            self._fp.writelines(GifImagePlugin.getdata(im, offset=offset, duration=duration, disposal=1))
+            self._pending = None
+
+    def close(self):
+        if self._fp:
+            self._flush()
+            self._fp.write(b";")
+            self._fp.close()
+            self._fp = None
+
+
+class PillowAnimationWriter:
+    """
+    Animated WebP (lossless) or APNG through Pillow. Pillow needs every frame
+    at save time, so frames are kept palettized (1 byte per pixel) until close().
+    """
+
+    def __init__(self, path, fps, fmt, loop=0, palette=None, theme_colors=()):
+        self.path = path
+        self.duration = int(1000 / fps)
+        self.fmt = fmt
+        self.loop = loop
+        self.palette = palette
+        self.theme_colors = theme_colors
+        self._frames = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, frame, delta=None):
+        if self.palette is None:
+            self.palette = Palette.from_theme(self.theme_colors, sample=frame)
+        self._frames.append(self.palette.to_image(frame))
+
+    def close(self):
+        if not self._frames:
+            return
+        first, rest = self._frames[0], self._frames[1:]
+        options = {"lossless": True, "method": 4} if self.fmt == 'WEBP' else {}
+        frames = [first] + rest
+        if self.fmt == 'WEBP':
+            frames = [im.convert('RGB') for im in frames]
+        frames[0].save(self.path, format=self.fmt, save_all=True, append_images=frames[1:],
+                       duration=self.duration, loop=self.loop, **options)
+        self._frames = []
+
+
+class FfmpegWriter:
+    """MP4 (H.264) through imageio-ffmpeg; streams frames, nothing is buffered."""
+
+    def __init__(self, path, fps, palette=None):
+        if imageio_ffmpeg is None:
+            raise RuntimeError("MP4 output needs imageio-ffmpeg. Run: pip install imageio-ffmpeg")
+        self._writer = imageio.get_writer(path, fps=fps, codec='libx264', quality=8,
+                                          pixelformat='yuv420p', macro_block_size=16)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, frame, delta=None):
+        self._writer.append_data(frame)
+
+    def close(self):
+        self._writer.close()
+
+
+FORMATS = {"gif": ".gif", "webp": ".webp", "apng": ".png", "mp4": ".mp4"}
+
+
+def open_animation_writer(path, fps, fmt="gif", palette=None, theme_colors=()):
+    """
+    Writer with append(frame, delta=None)/close() for one of FORMATS. Without
+    a palette, one is built from theme_colors and the first frame.
+    """
+    if fmt == "gif":
+        return DeltaGifWriter(path, fps, palette=palette, theme_colors=theme_colors)
+    if fmt in ("webp", "apng"):
+        fmt = "WEBP" if fmt == "webp" else "PNG"
+        return PillowAnimationWriter(path, fps, fmt, palette=palette, theme_colors=theme_colors)
+    if fmt == "mp4":
+        return FfmpegWriter(path, fps)
+    raise ValueError(f"Unknown animation format: {fmt}")
+
+
+def encode_highlight_animation(path, fps, base_png, layer_pngs, progress=None, fmt="gif", theme_colors=(),
+                               stage=_untimed):
+    """
+    Builds the animation from one base frame (nothing highlighted) and one
+    transparent highlight layer per step, composited in numpy. The palette is
+    computed once from the theme colors and the base frame.
+
+    Memory stays at about two frames: steps are drawn into one working buffer
+    by restoring the previous step's box from the base and blending in the
+    next layer, and only the visible crop of each layer is decoded to numpy.
+
+    stage(name) is entered around the decode/numpy/encode steps (bench_render.py
+    passes a timer).
+    """
+    with stage("decode"):
+        base = decode(base_png, 'RGB')
+    with stage("encode"):
+        palette = Palette.from_theme(theme_colors, sample=base)
+    frame = base.copy()
+    prev_box = None
+    with open_animation_writer(path, fps, fmt, palette=palette) as writer:
+        for i, png in enumerate(layer_pngs):
+            if progress:
+                progress(i)
+            layer, box = decode_layer(png, stage)
+            box = box and _clip(box, frame)
+            region = _union(prev_box, box)
+            before = None
+            if region is not None:
+                with stage("numpy"):
+                    x0, y0, x1, y1 = region
+                    before = frame[y0:y1, x0:x1].copy()
+                    if prev_box is not None:
+                        px0, py0, px1, py1 = prev_box
+                        frame[py0:py1, px0:px1] = base[py0:py1, px0:px1]
+                    if box is not None:
+                        compose(frame, layer, box)
+            with stage("encode"):
+                writer.append(frame, delta=(region, before) if i else None)
+            prev_box = box
@@ -0,0 +1,251 @@
+"""
+Level-of-detail reduction for oversized generated diagrams.
+
+When a graph has more nodes than the budget, it is shrunk before layout:
+  1. parallel edges between the same two nodes are merged into one,
+  2. clusters are collapsed into one summary node each (largest first),
+  3. leaf chains hanging off a node are folded into one "+N more" node.
+Steps 2 and 3 stop as soon as the graph fits. Layout then only sees the
+reduced graph, so both the server's layout time and the client's render time
+stay bounded. The budget is a target, not a guarantee: a graph without
+clusters or leaf chains (a dense mesh, say) can't be reduced this way and is
+laid out over budget -- bounded then by the fast layout's limits and the
+graphviz fallback (see reactflow.layout_dot).
+
+Every summary node carries an expand handle. The full graph is kept (see
+main.py's /expand), and expand() lays out just the group's members, placed
+around the summary node, for the client to swap in on demand.
+"""
+import hashlib
+
+from dotparse import DotGraph, parse_dot, to_dot
+from reactflow import parse_graphviz_to_reactflow, reactflow_edge
+
+SUMMARY_PREFIX = "lod_"
+
+
+def diagram_id(dot_code):
+    return hashlib.sha256(dot_code.encode()).hexdigest()[:16]
+
+
+def _label(name, attrs):
+    label = attrs.get("label", name)
+    return name if label in ("\\N", "") else label
+
+
+def _cluster_title(name, attrs):
+    title = attrs.get("label") or name.removeprefix("cluster").strip("_ ") or name
+    return title.replace("\\n", " ")
+
+
+def _degrees(names, edges):
+    neighbours = {n: set() for n in names}
+    for tail, head in edges:
+        if tail != head:
+            neighbours[tail].add(head)
+            neighbours[head].add(tail)
+    return neighbours
+
+
+def _leaf_chains(names, edges, fixed):
+    """
+    {anchor: [chain, ...]}: paths that end in a leaf, grouped by the node they
+    hang off. Nodes in fixed (summary nodes) are never folded into a chain.
+    """
+    neighbours = _degrees(names, edges)
+    chains = {}
+    for leaf in names:
+        if len(neighbours[leaf]) != 1 or leaf in fixed:
+            continue
+        chain, prev, node = [leaf], leaf, next(iter(neighbours[leaf]))
+        while len(neighbours[node]) == 2 and node not in fixed:
+            chain.append(node)
+            prev, node = node, next(n for n in neighbours[node] if n != prev)
+        if len(neighbours[node]) == 1 and node not in fixed:
+            continue  # an isolated path: both ends are leaves, nothing to hang it off
+        chains.setdefault(node, []).append(chain)
+    return chains
+
+
+def reduce_graph(graph, max_nodes):
+    """
+    Returns (reduced DotGraph, groups, rep). groups maps each summary node id to
+    {"kind": "cluster" | "chain", "label", "members"}; rep maps every original
+    node to the node that stands for it in the reduced graph.
+    """
+    rep = {n: n for n in graph.nodes}
+    groups = {}
+    visible = len(graph.nodes)
+
+    def collapse(kind, label, members, attrs):
+        nonlocal visible
+        group_id = f"{SUMMARY_PREFIX}{len(groups) + 1}"
+        while group_id in graph.nodes:
+            group_id += "_"
+        groups[group_id] = {"kind": kind, "label": label, "members": members, "attrs": attrs}
+        for m in members:
+            rep[m] = group_id
+        visible -= len(members) - 1
+
+    by_size = sorted(graph.clusters.items(), key=lambda c: -len(c[1]["nodes"]))
+    for name, cluster in by_size:
+        if visible <= max_nodes:
+            break
+        if len(cluster["nodes"]) > 1:
+            title = _cluster_title(name, cluster["attrs"])
+            collapse("cluster", title, list(cluster["nodes"]),
+                     {"label": f"{title}\\n({len(cluster['nodes'])} components)", "shape": "box3d"})
+
+    if visible > max_nodes:
+        names = [n for n in graph.nodes if rep[n] == n] + list(groups)
+        chains = _leaf_chains(names, {(rep[t], rep[h]) for t, h, _ in graph.edges}, set(groups))
+        for anchor, paths in sorted(chains.items(), key=lambda c: -sum(map(len, c[1]))):
+            if visible <= max_nodes:
+                break
+            # Fold the longest chains first, and only as many as the budget needs
+            members = []
+            for path in sorted(paths, key=len, reverse=True):
+                if visible - (len(members) - 1) <= max_nodes:
+                    break
+                members += path
+            if len(members) < 2:
+                continue
+            label = _label(anchor, graph.nodes[anchor]).replace("\\n", " ")
+            collapse("chain", f"{label}: {len(members)} more", members,
+                     {"label": f"+{len(members)} more", "shape": "note"})
+
+    reduced = DotGraph(graph.name, graph.directed, graph.strict)
+    reduced.attrs = dict(graph.attrs)
+    for name, cluster in graph.clusters.items():
+        kept = [n for n in cluster["nodes"] if rep[n] == n]
+        if kept:
+            reduced.clusters[name] = {"attrs": dict(cluster["attrs"]), "nodes": []}
+            for n in kept:
+                reduced.add_node(n, graph.nodes[n], name)
+    for n, attrs in graph.nodes.items():
+        if rep[n] == n and n not in graph.node_cluster:
+            reduced.add_node(n, attrs)
+    for group_id, group in groups.items():
+        reduced.add_node(group_id, group.pop("attrs"))
+
+    # Parallel edges (including ones that now meet at a summary node) become one edge
+    merged = {}
+    for tail, head, attrs in graph.edges:
+        key = (rep[tail], rep[head])
+        if key[0] == key[1] and key[0] in groups:
+            continue
+        if key in merged:
+            merged[key][1] += 1
+        else:
+            merged[key] = [dict(attrs), 1]
+    for (tail, head), (attrs, count) in merged.items():
+        if count > 1:
+            attrs["label"] = f"{count} flows"
+            attrs.pop("xlabel", None)
+        reduced.add_edge(tail, head, attrs)
+    return reduced, groups, rep
+
+
+def simplify(dot_code, max_nodes):
+    """
+    Returns (dot_code to lay out, state). state is None when the graph is within
+    budget (or can't be parsed, and graphviz will have to handle it as-is);
+    otherwise it is what expand() needs later, and the reduced DOT is returned.
+    The reduced graph can still be over max_nodes when nothing more folds.
+    """
+    if max_nodes <= 0:
+        return dot_code, None
+    try:
+        graph = parse_dot(dot_code)
+    except ValueError:
+        return dot_code, None
+    if len(graph.nodes) <= max_nodes:
+        return dot_code, None
+
+    reduced, groups, rep = reduce_graph(graph, max_nodes)
+    print(f"🔭 Level of detail: {len(graph.nodes)} -> {len(reduced.nodes)} nodes, "
+          f"{len(graph.edges)} -> {len(reduced.edges)} edges")
+    if len(reduced.nodes) > max_nodes:
+        print(f"⚠️ No more clusters or leaf chains to fold; laying out {len(reduced.nodes)} nodes "
+              f"(budget {max_nodes}).")
+    state = {"id": diagram_id(dot_code), "dot": dot_code, "groups": groups,
+             "rep": {n: r for n, r in rep.items() if n != r}, "positions": {}}
+    return to_dot(reduced), state
+
+
+def attach_handles(frontend_data, state):
+    """Marks the summary nodes as expandable and remembers where they were placed."""
+    for node in frontend_data["nodes"]:
+        group = state["groups"].get(node["id"])
+        if group:
+            node["data"]["expand"] = {"diagram": state["id"], "kind": group["kind"],
+                                      "count": len(group["members"]), "title": group["label"]}
+            state["positions"][node["id"]] = node["position"]
+    frontend_data["lod"] = {"diagram": state["id"], "collapsed": list(state["groups"])}
+    return frontend_data
+
+
+def expand(state, group_id, expanded=()):
+    """
+    React Flow nodes/edges for one collapsed group: its members laid out on their
+    own and centered on the summary node, plus the edges linking them to the
+    rest of the diagram. expanded holds the groups the client has already
+    expanded; edges into those end at the real member node, others at the
+    summary node that still stands for it. Returns None for an unknown group.
+    """
+    group = state["groups"].get(group_id)
+    if not group:
+        return None
+    graph = parse_dot(state["dot"])
+    members = set(group["members"])
+
+    sub = DotGraph(graph.name, graph.directed, graph.strict)
+    sub.attrs = {k: v for k, v in graph.attrs.items() if k not in ("label", "size", "ratio")}
+    for name, cluster in graph.clusters.items():
+        kept = [n for n in cluster["nodes"] if n in members]
+        if kept and group["kind"] == "chain":
+            sub.clusters[name] = {"attrs": dict(cluster["attrs"]), "nodes": []}
+            for n in kept:
+                sub.add_node(n, graph.nodes[n], name)
+    for n in group["members"]:
+        sub.add_node(n, graph.nodes[n])
+    for tail, head, attrs in graph.edges:
+        if tail in members and head in members:
+            sub.add_edge(tail, head, attrs)
+
+    data = parse_graphviz_to_reactflow(to_dot(sub))
+    if not data:
+        return None
+    center = state["positions"].get(group_id, {"x": 0, "y": 0})
+    xs = [n["position"]["x"] for n in data["nodes"]]
+    ys = [n["position"]["y"] for n in data["nodes"]]
+    dx = center["x"] - (min(xs) + max(xs)) / 2
+    dy = center["y"] - (min(ys) + max(ys)) / 2
+    for node in data["nodes"]:
+        node["position"] = {"x": node["position"]["x"] + dx, "y": node["position"]["y"] + dy}
+    for edge in data["edges"]:
+        points = edge["data"].get("points")
+        if points:
+            edge["data"]["points"] = [round(v + (dx if i % 2 == 0 else dy), 1) for i, v in enumerate(points)]
+        if edge["data"].get("arrow"):
+            x, y = edge["data"]["arrow"]
+            edge["data"]["arrow"] = [round(x + dx, 1), round(y + dy, 1)]
+
+    # Edges to the rest of the diagram, pointing at whatever node the client shows for the other end
+    rep = state["rep"]
+    expanded = set(expanded)
+
+    def visible(n):
+        if n in members or rep.get(n) in expanded:
+            return n
+        return rep.get(n, n)
+
+    seen = set()
+    for tail, head, attrs in graph.edges:
+        if (tail in members) == (head in members):
+            continue
+        source, target = visible(tail), visible(head)
+        if (source, target) not in seen:
+            seen.add((source, target))
+            data["edges"].append(reactflow_edge(source, target, attrs))
+    return {"replaces": group_id, "nodes": data["nodes"], "edges": data["edges"]}
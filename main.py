@@ -3,19 +3,33 @@ import warnings
 warnings.filterwarnings("ignore", category=RuntimeWarning, module="duckduckgo_search")
 
 print("⏳ Importing libraries...")
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import os
 import google.generativeai as genai
-import graphviz
-import json
 import requests
 from bs4 import BeautifulSoup
 import time
 import random
 import re
+import html
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from reactflow import parse_graphviz_to_reactflow, with_edge_routes
+from catalog import Catalog, default_path
+import lod
+from diagram_cache import BuildFailed, DiagramCache, cache_key
+from outbound import OutboundScheduler
+from prewarm import Refresher
+from prefetch import ContextPrefetcher, PrefetchBudgetExceeded
+from model_router import DEFAULT_TIERS, ModelRouter, parse_tiers
+from profiler import SamplingProfiler
+from animation_jobs import MEDIA_TYPES, AnimationJobs, QueueFull, reactflow_to_spec
 
 # Try importing the robust search library
 try:
@@ -36,7 +50,115 @@ else:
     print("🔑 API Key found.")
     genai.configure(api_key=api_key)
 
-app = FastAPI()
+# 2. Shared result cache (one SQLite file for every worker process)
+diagram_cache = DiagramCache(
+    os.getenv("DIAGRAM_CACHE_PATH", "diagram_cache.sqlite3"),
+    ttl=int(os.getenv("DIAGRAM_CACHE_TTL", "86400")),
+    stale_ttl=int(os.getenv("DIAGRAM_CACHE_STALE_TTL", str(7 * 86400))),
+    error_ttl=int(os.getenv("DIAGRAM_CACHE_ERROR_TTL", "15")),
+)
+
+# 3. Outbound limits: every search/scrape request waits for its host's token bucket.
+#    The buckets live in the shared SQLite file, so the limits hold across all workers.
+outbound = OutboundScheduler(
+    max_concurrency=int(os.getenv("OUTBOUND_CONCURRENCY", "8")),
+    rate=float(os.getenv("OUTBOUND_RATE", "1.0")),
+    burst=int(os.getenv("OUTBOUND_BURST", "3")),
+    host_limits={
+        "duckduckgo.com": (0.5, 2),
+        "html.duckduckgo.com": (0.5, 2),
+    },
+    store=diagram_cache,
+)
+# Pages are fetched on their own pool while the search is still returning URLs. Each topic has
+# at most SCRAPE_IN_FLIGHT fetches running, and the pool covers that for every request the
+# server's threadpool (40 threads) can run at once.
+SCRAPE_IN_FLIGHT = int(os.getenv("SCRAPE_IN_FLIGHT", "2"))
+scrape_pool = ThreadPoolExecutor(max_workers=int(os.getenv("SCRAPE_WORKERS", str(40 * SCRAPE_IN_FLIGHT))),
+                                 thread_name_prefix="scrape")
+
+# 4. Stale entries are refreshed in the background; popular topics are prewarmed when idle.
+#    A build makes at most one model call per tier (see 10.), and the budget reserves that many.
+MODEL_TIERS = parse_tiers(os.getenv("MODEL_TIERS", DEFAULT_TIERS))
+refresher = Refresher(
+    diagram_cache,
+    lambda topic: build_diagram(topic),
+    workers=int(os.getenv("REFRESH_WORKERS", "2")),
+    idle_seconds=int(os.getenv("PREWARM_IDLE_SECONDS", "30")),
+    top_n=int(os.getenv("PREWARM_TOP_N", "10")),
+    budget=int(os.getenv("PREWARM_LLM_BUDGET", "20")),
+    budget_window=int(os.getenv("PREWARM_BUDGET_WINDOW", "3600")),
+    calls_per_build=len(MODEL_TIERS),
+    # Expired diagrams, LOD states and prefetched contexts (prefetcher is set up in 9.)
+    purge=lambda: diagram_cache.purge({"context:": prefetcher.ttl}),
+    purge_interval=int(os.getenv("CACHE_PURGE_INTERVAL", "3600")),
+)
+
+# 5. Sampling profiler: compiled in, off unless PROFILER_ENABLED=1 or toggled at runtime
+profiler = SamplingProfiler(
+    enabled=os.getenv("PROFILER_ENABLED") == "1",
+    interval=float(os.getenv("PROFILER_INTERVAL_MS", "5")) / 1000,
+)
+
+# 6. Animation rendering: its own small pool, so it never takes threads from /generate
+animation_jobs = AnimationJobs(
+    diagram_cache,
+    out_dir=os.getenv("ANIMATION_DIR", ".animations"),
+    workers=int(os.getenv("ANIMATION_WORKERS", "1")),
+    render_workers=int(os.getenv("ANIMATION_RENDER_WORKERS", "2")),
+    max_queued=int(os.getenv("ANIMATION_MAX_QUEUED", "8")),
+)
+
+# 7. Prebuilt catalog (build_catalog.py): curated diagrams served without any search or LLM call.
+#    catalog.json is only read on the first /generate; without it (run `python build_catalog.py`
+#    where dot and neato are installed) every topic goes through generation.
+catalog = Catalog(default_path())
+
+# 8. Level of detail: generated graphs above this many nodes are reduced before layout (0 = off).
+#    The default matches FAST_LAYOUT_MAX_NODES, so reduced graphs are laid out in-process.
+LOD_MAX_NODES = int(os.getenv("LOD_MAX_NODES", "40"))
+
+# 9. Speculative prefetch: search + scrape run while the user types; /generate reuses the context
+prefetcher = ContextPrefetcher(
+    diagram_cache,
+    lambda topic, should_stop: scrape_system_design_data(topic, should_stop),
+    workers=int(os.getenv("PREFETCH_WORKERS", "2")),
+    ttl=int(os.getenv("PREFETCH_TTL", "300")),
+    debounce=float(os.getenv("PREFETCH_DEBOUNCE_MS", "400")) / 1000,
+    per_minute=int(os.getenv("PREFETCH_PER_MINUTE", "6")),
+    max_inflight=int(os.getenv("PREFETCH_MAX_INFLIGHT", "8")),
+)
+# How long /generate waits for a prefetch of the same topic that is already running
+PREFETCH_WAIT = float(os.getenv("PREFETCH_WAIT", "20"))
+
+# 10. LLM tiers: MODEL_TIERS="model:slo_seconds,..." cheapest first
+def gemini_backend(model, prompt, timeout):
+    response = genai.GenerativeModel(model).generate_content(prompt, request_options={"timeout": timeout})
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "text": response.text,
+        "input_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+model_router = ModelRouter(
+    MODEL_TIERS,
+    gemini_backend,
+    min_nodes=int(os.getenv("MODEL_MIN_NODES", "5")),
+    workers=int(os.getenv("MODEL_WORKERS", "40")),
+)
+
+@asynccontextmanager
+async def lifespan(app):
+    refresher.start()
+    yield
+    refresher.stop()
+    animation_jobs.stop()
+    scrape_pool.shutdown(wait=False, cancel_futures=True)
+    prefetcher.stop()
+    model_router.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,200 +170,178 @@ app.add_middleware(
 
 class TopicRequest(BaseModel):
     topic: str
+    profile: bool = False  # attach a sampled stack profile (profiler must be enabled)
+    edge_routes: bool = False  # send graphviz's edge paths (type "routed") instead of client-routed smoothstep edges
+
+class ProfilerToggle(BaseModel):
+    enabled: bool
+    all_requests: bool = False
+
+class PrefetchRequest(BaseModel):
+    topic: str
+    client_id: str | None = None  # per-tab id from the client; the budget is still per caller address
+
+class AnimateRequest(BaseModel):
+    # Bounded so one request can't queue an arbitrarily large render
+    nodes: list[dict] = Field(max_length=200)
+    edges: list[dict] = Field([], max_length=400)
+    steps: list[str | dict] | None = Field(None, max_length=200)  # edge ids or {source, target, label}; default: every edge
+    title: str | None = Field(None, max_length=200)
+    format: str = "gif"
+    fps: float = Field(1.0, gt=0, le=30)
 
 # --- 🔍 ROBUST SCRAPING ENGINE ---
-def get_search_results(query):
+SEARCH_RESULTS = 5
+SEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+_RESULT_LINK_RE = re.compile(r'<a\s[^>]*class="[^"]*\bresult__a\b[^"]*"[^>]*>')
+_HREF_RE = re.compile(r'href="([^"]*)"')
+
+def iter_result_links(chunks):
+    """Yields result__a hrefs from streamed HTML chunks as soon as each <a> tag is complete."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        end = 0
+        for m in _RESULT_LINK_RE.finditer(buffer):
+            end = m.end()
+            href = _HREF_RE.search(m.group(0))
+            if href:
+                yield html.unescape(href.group(1))
+        # Keep only a possibly unfinished tag for the next chunk
+        tail = buffer.rfind("<", end)
+        buffer = buffer[tail:] if tail != -1 else ""
+
+def iter_search_results(query, topic="default"):
     """
-    Tries 2 methods to get search results.
+    Yields result URLs one at a time. Tries 2 methods. Only the direct HTML
+    fallback streams: it yields each URL as the page downloads, so fetches can
+    start while the search is still running. The DDGS library returns its
+    results as one finished list, so on that path nothing overlaps the search.
     """
-    urls = []
-    
+    found = 0
+
     # METHOD 1: Library
     if DDGS:
         try:
             print("Trying Search Method 1 (Library)...")
-            results = DDGS().text(query, max_results=5)
-            if results:
-                for r in results:
-                    urls.append(r['href'])
-                print(f"✅ Found {len(urls)} URLs via Library.")
-                return urls
+            with outbound.slot("duckduckgo.com", topic):
+                for r in DDGS().text(query, max_results=SEARCH_RESULTS) or []:
+                    found += 1
+                    yield r['href']
+            if found:
+                print(f"✅ Found {found} URLs via Library.")
+                return
         except Exception as e:
             print(f"⚠️ Method 1 failed: {e}")
+            if found:
+                return
 
-    # METHOD 2: Direct HTML Fallback
+    # METHOD 2: Direct HTML Fallback, parsed while the page is still downloading
     print("Trying Search Method 2 (Direct HTML)...")
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        resp = requests.post(
-            "https://html.duckduckgo.com/html/",
-            data={'q': query},
-            headers=headers,
-            timeout=10
-        )
-        if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            for link in soup.find_all('a', class_='result__a'):
-                href = link.get('href')
-                if href and 'http' in href:
-                    urls.append(href)
-                if len(urls) >= 5: break
-            
-            if urls:
-                print(f"✅ Found {len(urls)} URLs via Direct HTML.")
-                return urls
+        url = "https://html.duckduckgo.com/html/"
+        with outbound.slot(url, topic):
+            with requests.post(url, data={'q': query}, headers=SEARCH_HEADERS, timeout=10, stream=True) as resp:
+                if resp.status_code == 200:
+                    resp.encoding = resp.encoding or "utf-8"
+                    for href in iter_result_links(resp.iter_content(chunk_size=4096, decode_unicode=True)):
+                        if 'http' in href:
+                            found += 1
+                            yield href
+                        if found >= SEARCH_RESULTS: break
+        if found:
+            print(f"✅ Found {found} URLs via Direct HTML.")
     except Exception as e:
         print(f"⚠️ Method 2 failed: {e}")
 
-    return urls
-
-def scrape_system_design_data(topic):
+def fetch_article(url, topic):
+    """Returns the page's article text, or None when it fails or is too short."""
+    try:
+        print(f"📄 Scraping: {url}")
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        response = outbound.request("GET", url, topic=topic, headers=headers, timeout=10)
+        
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.text, 'html.parser')
+            
+            content_div = soup.find('article') or soup.find('div', class_='article-content') or soup.find('main')
+            target = content_div if content_div else soup
+            
+            paragraphs = target.find_all(['p', 'li', 'h1', 'h2', 'h3'])
+            text_content = "\n".join([t.get_text().strip() for t in paragraphs if len(t.get_text()) > 30])
+            
+            # ⚡️ RELAXED CHECK: Just checking if we got ANY text (> 200 chars)
+            if len(text_content) > 200:
+                return text_content[:15000] # Increased limit for AI
+            print(f"⏩ Skipping {url}: Content too short.")
+                
+    except Exception as e:
+        print(f"⚠️ Failed to scrape {url}: {e}")
+    return None
+
+def _first_ready(fetches):
+    """The earliest good page in search order, once every page ranked above it has failed."""
+    for fetch in fetches:
+        if not fetch.done():
+            return None
+        if fetch.result():
+            return fetch.result()
+    return None
+
+def scrape_system_design_data(topic, should_stop=None):
+    """Web context for the prompt, or None. should_stop() is polled to abandon a superseded prefetch."""
     print(f"🕵️ Searching web for: {topic} system design...")
     
     # 🎯 GENERIC QUERY to get better results
     # We remove "High Level Design" from search sometimes to get broader results
     query = f"{topic} system design architecture"
     
-    urls = get_search_results(query)
-
-    if not urls:
-        print("❌ CRITICAL: No URLs found via any method.")
-        return None
-
-    best_content = ""
-    
-    for url in urls:
-        try:
-            print(f"📄 Scraping: {url}")
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                content_div = soup.find('article') or soup.find('div', class_='article-content') or soup.find('main')
-                target = content_div if content_div else soup
-                
-                paragraphs = target.find_all(['p', 'li', 'h1', 'h2', 'h3'])
-                text_content = "\n".join([t.get_text().strip() for t in paragraphs if len(t.get_text()) > 30])
-                
-                # ⚡️ RELAXED CHECK: Just checking if we got ANY text (> 200 chars)
-                if len(text_content) > 200:
-                    best_content = text_content[:15000] # Increased limit for AI
-                    print(f"🏆 Found content ({len(best_content)} chars). Using this!")
-                    return best_content 
-                else:
-                    print("⏩ Skipping: Content too short.")
-                    
-        except Exception as e:
-            print(f"⚠️ Failed to scrape {url}: {e}")
-            continue
-            
-    return None 
-
-# --- GRAPHVIZ PARSER ---
-def parse_graphviz_to_reactflow(dot_code):
+    # At most SCRAPE_IN_FLIGHT pages are fetched at once; the next URL only starts when one
+    # of them fails. Earlier results still win.
+    results = iter_search_results(query, topic)
+    fetches = []
+    best_content = None
     try:
-        src = graphviz.Source(dot_code)
-        src.engine = 'dot'
-        json_str = src.pipe(format='json').decode('utf-8')
-        layout_data = json.loads(json_str)
-        
-        nodes = []
-        edges = []
-        
-        SHAPE_MAP = {
-            "diamond": "diamond", "Mdiamond": "diamond", "triangle": "triangle",
-            "box": "default", "rect": "default", "rectangle": "default",
-            "circle": "circle", "doublecircle": "circle", "oval": "circle",
-            "ellipse": "circle", "cylinder": "database", "note": "default"
-        }
-
-        ICON_MAP = {
-            "mysql": "mysql", "cassandra": "cassandra", "postgres": "postgres",
-            "mongo": "mongo", "redis": "redis", "kafka": "kafka",
-            "rabbit": "rabbitmq", "docker": "docker", "k8s": "kubernetes",
-            "react": "react", "python": "python", "user": "user",
-            "aws": "aws", "ec2": "server", "lb": "load-balancer"
-        }
-
-        def process_objects(obj_list, parent_id=None):
-            for obj in obj_list:
-                if obj.get('name', '').startswith('cluster') or obj.get('name', '').startswith('subgraph'):
-                    if 'objects' in obj: process_objects(obj['objects'], obj['name'])
-                    continue
-
-                if not obj.get('name') or obj.get('name').startswith('%'): continue
-
-                pos = obj.get('pos', '0,0').split(',')
-                x = float(pos[0]) * 1.5
-                y = -float(pos[1]) * 1.5
-                
-                raw_label = obj.get('label', obj['name'])
-                if raw_label == '\\N' or not raw_label.strip(): raw_label = obj['name']
-                
-                label = raw_label.replace('\\n', '\n')
-                label_lower = label.lower()
-
-                node_type = "default"
-                icon_name = None
-
-                for keyword, icon_file in ICON_MAP.items():
-                    if keyword in label_lower:
-                        node_type = "imageNode"
-                        icon_name = icon_file
-                        break
-                
-                if node_type == "default":
-                    gv_shape = obj.get('shape', 'box')
-                    if gv_shape in SHAPE_MAP: node_type = SHAPE_MAP[gv_shape]
-                    if 'service' in label_lower and node_type == 'circle': node_type = 'diamond'
-
-                nodes.append({
-                    "id": obj['name'],
-                    "type": node_type,
-                    "position": {"x": x, "y": y},
-                    "data": { "label": label, "icon": icon_name },
-                    "parentNode": parent_id
-                })
-
-        process_objects(layout_data.get('objects', []))
-
-        for edge in layout_data.get('edges', []):
-            source_id = layout_data['objects'][edge['tail']]['name']
-            target_id = layout_data['objects'][edge['head']]['name']
-            style = edge.get('style', 'solid')
-            is_dashed = style == 'dashed' or style == 'dotted'
-            edge_label = edge.get('label', '') or edge.get('xlabel', '')
-            if edge_label: edge_label = edge_label.replace('\\n', '\n')
-
-            edges.append({
-                "id": f"e_{source_id}_{target_id}",
-                "source": source_id,
-                "target": target_id,
-                "animated": True, 
-                "label": edge_label,
-                "type": "smoothstep",
-                "style": { "stroke": "#555", "strokeWidth": 2, "strokeDasharray": "5,5" if is_dashed else "0" },
-                "data": { "isDashed": is_dashed }
-            })
-            
-        return {"nodes": nodes, "edges": edges}
-
-    except Exception as e:
-        print(f"Graphviz Error: {e}")
-        return None
+        while True:
+            if should_stop and should_stop():
+                print(f"🛑 Stopped searching for: {topic}")
+                return None
+            best_content = _first_ready(fetches)
+            if best_content:
+                break
+            running = [f for f in fetches if not f.done()]
+            while len(running) < SCRAPE_IN_FLIGHT:
+                url = next(results, None)
+                if url is None:
+                    break
+                # follow(): a profiled /generate samples the fetch (and its BeautifulSoup parse) too
+                fetches.append(scrape_pool.submit(profiler.follow(fetch_article), url, topic))
+                running.append(fetches[-1])
+            if not running:  # every page failed and the search has nothing left
+                break
+            # Wake up when a fetch finishes (or now and then, to check should_stop)
+            wait(running, timeout=0.25, return_when=FIRST_COMPLETED)
+    finally:
+        results.close()
+        for fetch in fetches:
+            fetch.cancel()
+
+    if not fetches:
+        print("❌ CRITICAL: No URLs found via any method.")
+    elif best_content:
+        print(f"🏆 Found content ({len(best_content)} chars). Using this!")
+    return best_content
 
-# --- MAIN GENERATION ENDPOINT ---
-@app.post("/generate")
-async def generate_diagram(request: TopicRequest):
-    topic = request.topic
+# --- GENERATION PIPELINE ---
+def build_diagram(topic):
+    """Scrape -> prompt -> Gemini -> layout. Blocking; runs in the threadpool."""
     print(f"🚀 Processing request for: {topic}")
 
     # 1. SCRAPING (Relaxed)
-    context_data = scrape_system_design_data(topic)
+    # A /prefetch for this topic may already have it (or be about to)
+    context_data = prefetcher.wait(cache_key(topic), timeout=PREFETCH_WAIT) or scrape_system_design_data(topic)
     
     if not context_data:
         print("❌ Scraping failed to find GOOD data, but we will ask Gemini to fallback to its own knowledge.")
@@ -278,33 +378,175 @@ async def generate_diagram(request: TopicRequest):
     """
 
     try:
-        # 3. CALL AI
-        model = genai.GenerativeModel('gemini-2.5-flash-lite') 
-        response = model.generate_content(prompt)
-        
-        # 4. CLEANUP
-        raw_dot = response.text.replace("```dot", "").replace("```", "").strip()
-        
-        if "digraphviz" in raw_dot: raw_dot = raw_dot.replace("digraphviz", "")
-        if "--" in raw_dot: raw_dot = raw_dot.replace("--", "->")
-        first_brace_index = raw_dot.find("{")
-        if first_brace_index != -1:
-            body = raw_dot[first_brace_index:]
-            raw_dot = f"strict digraph G {body}"
+        # 3. CALL AI (fast tier first, escalating only for invalid or sparse graphs)
+        # 4. CLEANUP happens in the router, which validates the cleaned DOT
+        raw_dot = model_router.generate(prompt, topic)["dot"]
         
-        # 5. PARSE
-        frontend_data = parse_graphviz_to_reactflow(raw_dot)
+        # 5. PARSE (oversized graphs are laid out reduced; the full graph is kept for /expand)
+        reduced_dot, lod_state = lod.simplify(raw_dot, LOD_MAX_NODES)
+        frontend_data = parse_graphviz_to_reactflow(reduced_dot)
         
         if not frontend_data:
             raise HTTPException(status_code=500, detail="Failed to parse Graphviz output")
 
+        if lod_state:
+            lod.attach_handles(frontend_data, lod_state)
+            diagram_cache.set(f"lod:{lod_state['id']}", lod_state)
+
         return frontend_data
 
     except Exception as e:
         print(f"❌ Server Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- 🔬 PROFILER ---
+def check_profiler_token(token):
+    expected = os.getenv("PROFILER_TOKEN")
+    if not expected or token != expected:
+        raise HTTPException(status_code=403, detail="Profiler access requires PROFILER_TOKEN")
+
+@app.post("/debug/profiler")
+async def toggle_profiler(toggle: ProfilerToggle, x_profiler_token: str = Header(None)):
+    check_profiler_token(x_profiler_token)
+    profiler.enabled = toggle.enabled
+    profiler.all_requests = toggle.all_requests
+    print(f"🔬 Profiler {'enabled' if toggle.enabled else 'disabled'} (pid {os.getpid()})")
+    return {"enabled": profiler.enabled, "all_requests": profiler.all_requests, "pid": os.getpid()}
+
+@app.get("/debug/profiles")
+async def list_profiles(x_profiler_token: str = Header(None)):
+    check_profiler_token(x_profiler_token)
+    return profiler.list()
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_profiler_token: str = Header(None)):
+    check_profiler_token(x_profiler_token)
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Unknown profile (profiles are kept per worker)")
+    return profile.collapsed()
+
+def generate_profiled(key, topic, attach):
+    """
+    Cache-miss generation with the calling thread sampled; the profile is not
+    cached. It is attached only when the request asked for it (attach); profiles
+    taken because all_requests is on stay behind the token-gated /debug/profiles.
+    """
+    with profiler.capture(topic) as profile:
+        value = diagram_cache.single_flight(key, lambda: build_diagram(topic))
+    if not attach:
+        print(f"🔬 Profiled {topic}: /debug/profiles/{profile.id}")
+        return value
+    return {**value, "profile": {**profile.summary(), "collapsed": profile.collapsed()}}
+
+@app.get("/stats/outbound")
+async def outbound_stats():
+    return outbound.stats()
+
+@app.get("/stats/models")
+async def model_stats():
+    return model_router.metrics.snapshot()
+
+# --- 🎞️ ANIMATIONS ---
+@app.post("/animate", status_code=202)
+async def animate_diagram(request: AnimateRequest):
+    try:
+        spec = reactflow_to_spec(request.nodes, request.edges, request.steps, request.title, request.fps)
+        return animation_jobs.submit(spec, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@app.get("/animate/{job_id}")
+async def animation_status(job_id: str):
+    job = animation_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown animation job")
+    return job
+
+@app.get("/animate/{job_id}/result")
+async def animation_result(job_id: str):
+    job = animation_jobs.get(job_id)
+    if not job or job["status"] != "done":
+        raise HTTPException(status_code=404, detail="Animation not ready")
+    return FileResponse(animation_jobs.result_path(job_id, job["format"]), media_type=MEDIA_TYPES[job["format"]])
+
+# --- 🔭 LEVEL OF DETAIL ---
+@app.get("/expand/{diagram_id}/{node_id}")
+async def expand_node(diagram_id: str, node_id: str, edge_routes: bool = False, expanded: str = ""):
+    """
+    Nodes and edges hidden behind one summary node of a reduced diagram.
+    expanded: comma-separated summary node ids the client has already expanded.
+    """
+    hit = diagram_cache.get(f"lod:{diagram_id}", max_age=diagram_cache.stale_ttl)
+    if not hit:
+        raise HTTPException(status_code=404, detail="Unknown diagram (it may have expired)")
+    groups = [g for g in expanded.split(",") if g]
+    result = await run_in_threadpool(lod.expand, hit[0], node_id, groups)
+    if not result:
+        raise HTTPException(status_code=404, detail="Nothing to expand for that node")
+    return with_edge_routes(result, edge_routes)
+
+# --- 🔮 PREFETCH ---
+@app.post("/prefetch", status_code=202)
+async def prefetch_context(request: PrefetchRequest, http_request: Request):
+    """Best-effort: warms the web context for a topic the user is still typing."""
+    topic = request.topic
+    if catalog.lookup(topic):
+        return {"status": "catalog"}
+    if diagram_cache.get(cache_key(topic)):
+        return {"status": "cached"}
+    host = http_request.client.host if http_request.client else "anonymous"
+    try:
+        return {"status": prefetcher.submit(host, request.client_id, topic)}
+    except PrefetchBudgetExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+# --- MAIN GENERATION ENDPOINT ---
+@app.post("/generate")
+async def generate_diagram(request: TopicRequest):
+    # Edge routes are always kept in the cache; only clients that draw them get them
+    return with_edge_routes(await find_diagram(request), request.edge_routes)
+
+async def find_diagram(request):
+    """Catalog, then cache, then the generation pipeline."""
+    topic = request.topic
+    key = cache_key(topic)
+    refresher.touch()
+
+    prebuilt = catalog.lookup(topic)
+    if prebuilt:
+        print(f"📚 Catalog hit for: {topic}")
+        return prebuilt
+
+    diagram_cache.record_access(key, topic)
+
+    hit = diagram_cache.get(key, max_age=diagram_cache.stale_ttl)
+    if hit:
+        value, age = hit
+        if age > diagram_cache.ttl:
+            # Stale-while-revalidate: answer now, regenerate in the background
+            print(f"⏳ Serving stale diagram for: {topic} ({age:.0f}s old), refreshing...")
+            refresher.refresh(key, topic)
+        else:
+            print(f"⚡ Cache hit for: {topic} ({age:.0f}s old)")
+        return value
+
+    try:
+        if profiler.wanted(request.profile):
+            return await run_in_threadpool(generate_profiled, key, topic, request.profile)
+
+        # Only one worker generates a topic at a time; the others wait for its result
+        return await diagram_cache.single_flight_async(key, lambda: build_diagram(topic))
+    except BuildFailed as e:
+        raise HTTPException(status_code=503, detail=f"Generation just failed for this topic; retry shortly ({e})")
+
 if __name__ == "__main__":
-    import uvicorn
-    print("🦄 Server is starting on http://localhost:8000")
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("SERVE_MODE", "dev") == "prod":
+        from serve import run_production
+        run_production("main:app", host="0.0.0.0", port=8000)
+    else:
+        import uvicorn
+        print("🦄 Server is starting on http://localhost:8000")
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Model tiering for the LLM stage of /generate.
+
+Every prompt goes to the fast (cheapest) tier first. The answer is cleaned up
+and checked locally with dotparse; only when it doesn't parse, or the graph is
+too sparse to be a useful design, is the next, stronger tier asked. Each tier
+has a latency SLO: a call that overruns it is abandoned, and the best answer a
+cheaper tier already gave is used instead. The SLO clock (and the recorded
+latency) starts when the call does, not while it waits for a free worker.
+
+The backend is any callable backend(model, prompt, timeout) returning
+{"text", "input_tokens", "output_tokens"}, so the router can be exercised with
+stub backends and no network. Every call and decision is recorded (latency,
+tokens, outcome) for /stats/models.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from dotparse import DotParseError, parse_dot
+
+# model:timeout_seconds, cheapest first
+DEFAULT_TIERS = "gemini-2.5-flash-lite:20,gemini-2.5-flash:45"
+
+
+class ModelsUnavailable(Exception):
+    pass
+
+
+def parse_tiers(spec):
+    """'model:timeout,model:timeout' -> [(model, timeout)]."""
+    tiers = []
+    for item in spec.split(","):
+        model, _, timeout = item.strip().rpartition(":")
+        if not model:
+            raise ValueError(f"Bad model tier {item!r}; expected model:timeout_seconds")
+        tiers.append((model, float(timeout)))
+    if not tiers:
+        raise ValueError("At least one model tier is needed")
+    return tiers
+
+
+def clean_dot(text):
+    """Strips markdown fences and the usual LLM slips, and forces 'strict digraph G {'."""
+    raw_dot = text.replace("```dot", "").replace("```", "").strip()
+
+    if "digraphviz" in raw_dot: raw_dot = raw_dot.replace("digraphviz", "")
+    if "--" in raw_dot: raw_dot = raw_dot.replace("--", "->")
+    first_brace_index = raw_dot.find("{")
+    if first_brace_index != -1:
+        body = raw_dot[first_brace_index:]
+        raw_dot = f"strict digraph G {body}"
+    return raw_dot
+
+
+def check_dot(dot, min_nodes, min_edges_per_node):
+    """Returns None when the DOT is usable, else 'invalid' or 'sparse'."""
+    try:
+        graph = parse_dot(dot)
+    except DotParseError:
+        return "invalid"
+    if len(graph.nodes) < min_nodes or len(graph.edges) < min_edges_per_node * len(graph.nodes):
+        return "sparse"
+    return None
+
+
+class RouterMetrics:
+    """Per-tier call counters and recent latencies, plus the last few routing decisions."""
+
+    def __init__(self, samples=200, decisions=50):
+        self._lock = threading.Lock()
+        self._samples = samples
+        self._tiers = {}
+        self._decisions = deque(maxlen=decisions)
+
+    def record_call(self, model, outcome, latency, completion=None):
+        with self._lock:
+            stats = self._tiers.setdefault(model, {
+                "calls": 0, "outcomes": {}, "input_tokens": 0, "output_tokens": 0,
+                "latencies": deque(maxlen=self._samples),
+            })
+            stats["calls"] += 1
+            stats["outcomes"][outcome] = stats["outcomes"].get(outcome, 0) + 1
+            stats["latencies"].append(latency)
+            if completion:
+                stats["input_tokens"] += completion.get("input_tokens", 0)
+                stats["output_tokens"] += completion.get("output_tokens", 0)
+
+    def record_decision(self, topic, attempts, chosen, reason):
+        with self._lock:
+            self._decisions.append({"at": time.time(), "topic": topic, "attempts": attempts,
+                                    "chosen": chosen, "reason": reason})
+
+    def snapshot(self):
+        with self._lock:
+            tiers = {}
+            for model, s in self._tiers.items():
+                latencies = sorted(s["latencies"])
+                pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000)
+                tiers[model] = {
+                    "calls": s["calls"],
+                    "outcomes": dict(s["outcomes"]),
+                    "success_rate": round(s["outcomes"].get("ok", 0) / s["calls"], 3),
+                    "latency_p50_ms": pick(0.5),
+                    "latency_p95_ms": pick(0.95),
+                    "input_tokens": s["input_tokens"],
+                    "output_tokens": s["output_tokens"],
+                }
+            return {"tiers": tiers, "decisions": list(self._decisions)}
+
+
+class ModelRouter:
+    def __init__(self, tiers, backend, min_nodes=5, min_edges_per_node=0.6, workers=40):
+        """
+        tiers: [(model, timeout_seconds)], cheapest first. A graph with fewer
+        than min_nodes nodes, or fewer than min_edges_per_node edges per node,
+        counts as too sparse. workers should cover the requests that can call
+        at once (the default matches the server's threadpool).
+        """
+        self.tiers = tiers
+        self.backend = backend
+        self.min_nodes = min_nodes
+        self.min_edges_per_node = min_edges_per_node
+        self.metrics = RouterMetrics()
+        # Calls run here so an SLO overrun can be abandoned (the call itself finishes in the background)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+
+    def _call(self, model, timeout, prompt):
+        """
+        Returns (outcome, latency, completion); outcome is ok/timeout/error.
+        The timeout counts from when a worker starts the call; the backend gets
+        it too, so an abandoned call also ends on its own and frees the worker.
+        """
+        started = threading.Event()
+        start = [None]
+
+        def timed():
+            start[0] = time.perf_counter()
+            started.set()
+            completion = self.backend(model, prompt, timeout)
+            return completion, time.perf_counter() - start[0]
+
+        future = self._pool.submit(timed)
+        future.add_done_callback(lambda f: started.set())  # cancelled before it ever ran (shutdown)
+        started.wait()
+        if start[0] is None:
+            return "error", 0.0, None
+        try:
+            completion, latency = future.result(timeout=max(0.0, start[0] + timeout - time.perf_counter()))
+            return "ok", latency, completion
+        except FutureTimeout:
+            return "timeout", time.perf_counter() - start[0], None
+        except Exception as e:
+            print(f"⚠️ {model} failed: {e}")
+            return "error", time.perf_counter() - start[0], None
+
+    def generate(self, prompt, topic=""):
+        """
+        Returns {"dot", "model", "reason"}. Raises ModelsUnavailable when no
+        tier produced any text at all.
+        """
+        attempts = []
+        fallback = None  # (dot, model, problem): the best imperfect answer so far
+        for i, (model, timeout) in enumerate(self.tiers):
+            outcome, latency, completion = self._call(model, timeout, prompt)
+            dot = clean_dot(completion["text"]) if completion else None
+            problem = check_dot(dot, self.min_nodes, self.min_edges_per_node) if dot else None
+            recorded = problem or outcome
+            self.metrics.record_call(model, recorded, latency, completion)
+            attempts.append({"model": model, "outcome": recorded, "latency_ms": round(latency * 1000),
+                             "input_tokens": (completion or {}).get("input_tokens", 0),
+                             "output_tokens": (completion or {}).get("output_tokens", 0)})
+
+            if dot and not problem:
+                reason = "fast tier" if i == 0 else f"escalated after {attempts[-2]['outcome']}"
+                return self._decide(topic, attempts, {"dot": dot, "model": model, "reason": reason})
+            if dot and (fallback is None or (fallback[2] == "invalid" and problem == "sparse")):
+                fallback = (dot, model, problem)
+            if outcome == "timeout" and fallback:
+                print(f"⏱️ {model} missed its {timeout:g}s SLO; using the {fallback[1]} answer.")
+                break
+            if i < len(self.tiers) - 1:
+                print(f"⬆️ {model}: {recorded}, escalating.")
+
+        if fallback:
+            dot, model, problem = fallback
+            return self._decide(topic, attempts, {"dot": dot, "model": model, "reason": f"best effort ({problem})"})
+        self.metrics.record_decision(topic, attempts, None, "no answer")
+        raise ModelsUnavailable("No model tier returned an answer")
+
+    def _decide(self, topic, attempts, routed):
+        self.metrics.record_decision(topic, attempts, routed["model"], routed["reason"])
+        print(f"🧭 {routed['model']} answered ({routed['reason']}).")
+        return routed
+
+    def stop(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
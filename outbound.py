@@ -0,0 +1,158 @@
+"""
+Outbound request scheduler.
+
+Every call the server makes to a third-party site goes through one scheduler
+that enforces a token bucket per host plus a global concurrency cap. Callers
+that can't go yet wait in a per-topic queue, and topics are served
+round-robin, so one busy topic can't starve the others. Queue wait times are
+kept per host for the /stats/outbound endpoint.
+
+With a shared store (DiagramCache.take_token) the token buckets live in the
+SQLite file every server worker uses, so a host's rate limit holds for the
+whole box rather than per worker process. Queues and the concurrency cap stay
+per process.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Takes a token if there is one. Returns 0, or the seconds until one is due."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("host", "enqueued", "granted")
+
+    def __init__(self, host):
+        self.host = host
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class OutboundScheduler:
+    def __init__(self, max_concurrency=8, rate=1.0, burst=3, host_limits=None, store=None):
+        """
+        rate/burst are the default token bucket (requests per second, bucket size);
+        host_limits maps a hostname to its own (rate, burst). store: an object with
+        take_token(host, rate, burst) shared by all workers; None keeps buckets in memory.
+        """
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.host_limits = host_limits or {}
+        self.store = store
+        self._cond = threading.Condition()
+        self._queues = OrderedDict()  # topic -> deque of waiters, in round-robin order
+        self._buckets = {}
+        self._active = 0
+        self._stats = {}
+
+    def _take(self, host):
+        rate, burst = self.host_limits.get(host, (self.rate, self.burst))
+        if self.store is not None:
+            return self.store.take_token(host, rate, burst)
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(rate, burst)
+        return self._buckets[host].take()
+
+    def _dispatch(self):
+        """Grants queued waiters round-robin by topic. Returns seconds until a token frees up."""
+        blocked = {}  # host -> seconds until its next token, found during this pass
+        progress = True
+        while progress and self._active < self.max_concurrency:
+            progress = False
+            for topic in list(self._queues):
+                if self._active >= self.max_concurrency:
+                    break
+                queue = self._queues[topic]
+                served = None
+                for waiter in queue:
+                    if waiter.host in blocked:
+                        continue
+                    wait = self._take(waiter.host)
+                    if wait == 0:
+                        served = waiter
+                        break
+                    blocked[waiter.host] = wait
+                if served is None:
+                    continue
+                served.granted = True
+                queue.remove(served)
+                self._active += 1
+                progress = True
+                # The topic just served goes to the back of the line
+                if queue:
+                    self._queues.move_to_end(topic)
+                else:
+                    del self._queues[topic]
+
+        if self._active >= self.max_concurrency:
+            return None  # a finishing request will notify us
+        waits = [blocked.get(w.host, 0.0) for q in self._queues.values() for w in q]
+        return max(min(waits), 0.01) if waits else None
+
+    def _record(self, host, waited):
+        s = self._stats.setdefault(host, {"requests": 0, "wait_total": 0.0, "wait_max": 0.0})
+        s["requests"] += 1
+        s["wait_total"] += waited
+        s["wait_max"] = max(s["wait_max"], waited)
+
+    @contextmanager
+    def slot(self, url_or_host, topic="default"):
+        """Blocks until the host's bucket and the global cap allow one more request."""
+        host = urlparse(url_or_host).hostname or url_or_host
+        waiter = _Waiter(host)
+        with self._cond:
+            self._queues.setdefault(topic, deque()).append(waiter)
+            while True:
+                delay = self._dispatch()
+                if waiter.granted:
+                    break
+                self._cond.notify_all()
+                self._cond.wait(timeout=delay)
+            self._cond.notify_all()
+            self._record(host, time.monotonic() - waiter.enqueued)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def request(self, method, url, topic="default", **kwargs):
+        with self.slot(url, topic):
+            return requests.request(method, url, **kwargs)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": sum(len(q) for q in self._queues.values()),
+                "hosts": {
+                    host: {
+                        "requests": s["requests"],
+                        "queue_wait_avg_ms": round(s["wait_total"] / s["requests"] * 1000, 1),
+                        "queue_wait_max_ms": round(s["wait_max"] * 1000, 1),
+                    }
+                    for host, s in self._stats.items()
+                },
+            }
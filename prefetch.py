@@ -0,0 +1,146 @@
+"""
+Speculative context prefetch while the user is still typing a topic.
+
+The client calls /prefetch (debounced) as the topic box changes. The cheap,
+network-bound stages -- search and scrape, i.e. the prompt's web context --
+run ahead of time and land in the shared cache for a few minutes, so the
+eventual /generate only pays for the LLM call and layout.
+
+Prefetching is best-effort and kept on a short leash:
+  - a request only starts after a quiet debounce period,
+  - each client has one prefetch at a time; a newer topic (the user kept
+    typing) cancels the older one, before its network calls if possible,
+  - each caller address may start only so many prefetches per minute,
+    however many client ids it presents,
+  - only so many prefetches may be in flight at once, across all callers,
+  - both limits are counted in the shared cache database, so they hold for
+    the whole server, not per worker process,
+  - prefetches run on their own small pool, never /generate's threads.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from diagram_cache import cache_key
+
+
+class PrefetchBudgetExceeded(Exception):
+    pass
+
+
+class ContextPrefetcher:
+    def __init__(self, cache, scrape, workers=2, ttl=300, debounce=0.4, per_minute=6, max_inflight=8,
+                 min_chars=3):
+        """
+        scrape(topic, should_stop) -> context text or None. ttl: how long a
+        prefetched context is reused; debounce: quiet seconds before a prefetch
+        starts; per_minute: prefetches one caller address may start per minute;
+        max_inflight: queued or running prefetches allowed at once, in total.
+        """
+        self.cache = cache
+        self.scrape = scrape
+        self.ttl = ttl
+        self.debounce = debounce
+        self.per_minute = per_minute
+        self.max_inflight = max_inflight
+        self.min_chars = min_chars
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._clients = {}   # (host, client) -> current job
+        self._inflight = {}  # topic key -> job started here
+
+    def cached(self, key):
+        hit = self.cache.get(f"context:{key}", max_age=self.ttl)
+        return hit[0] if hit else None
+
+    def submit(self, host, client, topic):
+        """
+        Schedules a prefetch. host is the caller's address (what the budget is
+        charged to); client tells apart the tabs behind it. Returns the status;
+        raises PrefetchBudgetExceeded.
+        """
+        key = cache_key(topic)
+        if len(key) < self.min_chars:
+            return "ignored"
+        if self.cached(key) is not None:
+            return "ready"
+
+        with self._lock:
+            current = self._clients.get((host, client))
+            running = current and not current["done"].is_set()
+            if running and current["key"] == key:
+                return "running"
+            if key in self._inflight:
+                return "running"  # another client is already fetching this topic
+
+            # The job this one supersedes is on its way out, so it doesn't count as in flight
+            verdict = self.cache.start_prefetch(host, key, self.per_minute, self.max_inflight,
+                                                replacing=current["key"] if running else None)
+            if verdict == "running":
+                return "running"  # another worker is fetching this topic
+            if verdict == "budget":
+                raise PrefetchBudgetExceeded("Prefetch budget used up; try again in a minute")
+            if verdict == "inflight":
+                raise PrefetchBudgetExceeded("Too many prefetches in flight; try again shortly")
+
+            if running:
+                current["cancel"].set()  # superseded: the user kept typing
+            job = {"key": key, "topic": topic, "cancel": threading.Event(), "done": threading.Event()}
+            self._clients[(host, client)] = job
+            self._inflight[key] = job
+            self._forget_idle()
+
+        timer = threading.Timer(self.debounce, self._start, (job,))
+        timer.daemon = True
+        timer.start()
+        return "queued"
+
+    def _forget_idle(self):
+        for client in [c for c, job in self._clients.items() if job["done"].is_set()]:
+            del self._clients[client]
+
+    def _start(self, job):
+        if job["cancel"].is_set():
+            self._finish(job)  # superseded during the debounce window: no network calls at all
+            return
+        try:
+            self._pool.submit(self._run, job)
+        except RuntimeError:  # shutting down
+            self._finish(job)
+
+    def _run(self, job):
+        try:
+            if job["cancel"].is_set():
+                return
+            print(f"🔮 Prefetching context for: {job['topic']}")
+            context = self.scrape(job["topic"], should_stop=job["cancel"].is_set)
+            if context:
+                self.cache.set(f"context:{job['key']}", context)
+        except Exception as e:
+            print(f"⚠️ Prefetch failed for {job['topic']}: {e}")
+        finally:
+            self._finish(job)
+
+    def _finish(self, job):
+        with self._lock:
+            if self._inflight.get(job["key"]) is job:
+                del self._inflight[job["key"]]
+                self.cache.end_prefetch(job["key"])
+        job["done"].set()
+
+    def wait(self, key, timeout):
+        """
+        The prefetched context for key, waiting up to timeout seconds if a
+        prefetch for it is still running here. None when there is nothing to reuse.
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+        if job and not job["cancel"].is_set():
+            job["done"].wait(timeout)
+        return self.cached(key)
+
+    def stop(self):
+        with self._lock:
+            for key, job in self._inflight.items():
+                job["cancel"].set()
+                self.cache.end_prefetch(key)  # queued jobs are dropped without reaching _finish
+        self._pool.shutdown(wait=False, cancel_futures=True)
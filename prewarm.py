@@ -0,0 +1,121 @@
+"""
+Background refresh for cached diagrams.
+
+Stale cache hits are served right away and handed to `Refresher.refresh`,
+which regenerates them on a small worker pool. While the server is idle the
+prewarm loop also regenerates the most popular topics before they go stale,
+spending at most `budget` LLM calls per `budget_window` seconds (the budget
+is shared by all worker processes through the cache database). A build may
+make up to `calls_per_build` model calls (one per model tier when it
+escalates), so that many are reserved for every topic. Every
+`purge_interval` seconds the loop also runs `purge()` (busy or not), which
+keeps the shared cache file from growing without bound.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Refresher:
+    def __init__(self, cache, build, workers=2, idle_seconds=30, interval=60,
+                 top_n=10, budget=20, budget_window=3600, calls_per_build=1, purge=None, purge_interval=3600):
+        self.cache = cache
+        self.build = build
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.top_n = top_n
+        self.budget = budget
+        self.budget_window = budget_window
+        self.calls_per_build = calls_per_build
+        self.purge = purge
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+        self._out_of_budget = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._last_request = time.monotonic()
+        self._stop = threading.Event()
+
+    def touch(self):
+        """Marks the server as busy; prewarming only runs after idle_seconds of quiet."""
+        self._last_request = time.monotonic()
+
+    def refresh(self, key, topic, budgeted=False):
+        """
+        Queues a background regeneration of one topic (deduplicated). A
+        budgeted refresh (prewarming) is charged to the LLM budget only once it
+        actually holds the topic's lease.
+        """
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+        self._pool.submit(self._run, key, topic, budgeted)
+        return True
+
+    def _run(self, key, topic, budgeted=False):
+        owner = uuid.uuid4().hex
+        try:
+            # Another worker may already be generating this topic
+            if not self.cache.try_lease(key, owner):
+                return
+            if budgeted and not self.cache.spend_llm_budget(self.budget, self.budget_window, self.calls_per_build):
+                self._out_of_budget = True
+                self.cache.release(key, owner)
+                return
+            print(f"♻️ Refreshing cached diagram: {topic}")
+            # Renewed while the build runs, so a slow build isn't started a second time elsewhere
+            self.cache.compute_leased(key, owner, lambda: self.build(topic))
+        except Exception as e:
+            print(f"⚠️ Background refresh failed for {topic}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    # --- PREWARMING ---
+    def prewarm_once(self):
+        """Refreshes popular topics that are missing or close to going stale."""
+        queued = 0
+        self._out_of_budget = False
+        for key, topic in self.cache.hottest(self.top_n):
+            hit = self.cache.get(key, max_age=self.cache.stale_ttl)
+            if hit and hit[1] < self.cache.ttl * 0.8:
+                continue
+            if self._out_of_budget:  # set by a refresh queued earlier in this pass
+                print("💤 Prewarm budget used up for this window.")
+                break
+            if self.refresh(key, topic, budgeted=True):
+                queued += 1
+        return queued
+
+    def _purge(self):
+        if not self.purge or time.monotonic() - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = time.monotonic()
+        try:
+            deleted = self.purge()
+            if deleted:
+                print(f"🧹 Purged {deleted} expired cache rows.")
+        except Exception as e:
+            print(f"⚠️ Cache purge failed: {e}")
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._purge()
+            if time.monotonic() - self._last_request < self.idle_seconds:
+                continue
+            try:
+                queued = self.prewarm_once()
+                if queued:
+                    print(f"🔥 Prewarming {queued} popular topics.")
+            except Exception as e:
+                print(f"⚠️ Prewarm pass failed: {e}")
+
+    def start(self):
+        threading.Thread(target=self._loop, name="prewarm", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+"""
+On-demand sampling profiler for live requests.
+
+A helper thread snapshots the target thread's stack every few milliseconds
+(via sys._current_frames) and counts identical stacks. Work the target hands
+to a pool is sampled too when it is wrapped with follow() (main.py does this
+for the page fetches, where BeautifulSoup runs). The result is emitted
+in collapsed-stack format ("root;child;leaf count" per line), which
+flamegraph.pl, speedscope and inferno read directly.
+
+Nothing runs unless profiling is switched on, so leaving it compiled in
+costs one flag check per request. The switch and the profile store are per
+worker process.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Profile:
+    def __init__(self, profile_id, label):
+        self.id = profile_id
+        self.label = label
+        self.samples = Counter()
+        self.threads = set()  # thread ids being sampled
+        self.started = time.time()
+        self.duration = 0.0
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 1),
+            "samples": sum(self.samples.values()),
+        }
+
+
+class SamplingProfiler:
+    def __init__(self, enabled=False, interval=0.005, keep=20):
+        self.enabled = enabled
+        self.all_requests = False
+        self.interval = interval
+        self.keep = keep
+        self._profiles = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._capturing = {}  # thread id -> its Profile, while capture() runs there
+
+    def wanted(self, requested):
+        """True when this request should be profiled."""
+        return self.enabled and (requested or self.all_requests)
+
+    @contextmanager
+    def capture(self, label):
+        """
+        Samples the calling thread (and threads running work it passed through
+        follow()) until the block exits. Yields the Profile.
+        """
+        profile = Profile(f"{os.getpid()}-{next(self._ids)}", label)
+        target = threading.get_ident()
+        profile.threads.add(target)
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.interval):
+                frames = sys._current_frames()
+                for ident in tuple(profile.threads):
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        profile.samples[_stack(frame)] += 1
+
+        sampler = threading.Thread(target=sample, name="profiler", daemon=True)
+        start = time.perf_counter()
+        with self._lock:
+            self._capturing[target] = profile
+        sampler.start()
+        try:
+            yield profile
+        finally:
+            done.set()
+            sampler.join()
+            with self._lock:
+                self._capturing.pop(target, None)
+            profile.duration = time.perf_counter() - start
+            self._store(profile)
+
+    def follow(self, fn):
+        """
+        fn, wrapped so that whichever thread runs it is sampled into the calling
+        thread's profile while it does. fn itself when nothing is being captured here.
+        """
+        with self._lock:
+            profile = self._capturing.get(threading.get_ident())
+        if profile is None:
+            return fn
+
+        def followed(*args, **kwargs):
+            ident = threading.get_ident()
+            profile.threads.add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.threads.discard(ident)
+        return followed
+
+    def _store(self, profile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return [p.summary() for p in reversed(self._profiles.values())]
@@ -0,0 +1,174 @@
+"""
+Graphviz DOT -> React Flow JSON (the shape /generate returns and the client draws).
+"""
+import json
+import os
+
+import graphviz
+
+from dotparse import parse_dot
+from fast_layout import layered_layout
+
+# --- GRAPHVIZ PARSER ---
+# Graphviz points -> React Flow coordinates: scaled up, y axis flipped
+FLOW_SCALE = 1.5
+
+# Graphs up to this many nodes and edges are laid out in-process (0 = always use graphviz).
+# fast_layout also gives up (LayoutTooLarge) on graphs whose long edges need too many dummy nodes.
+FAST_LAYOUT_MAX_NODES = int(os.getenv("FAST_LAYOUT_MAX_NODES", "40"))
+FAST_LAYOUT_MAX_EDGES = int(os.getenv("FAST_LAYOUT_MAX_EDGES", "120"))
+
+def layout_dot(dot_code, engine=None):
+    """
+    Returns graphviz -Tjson style layout data. Small graphs use the in-process
+    layered layout; big or unsupported ones fall back to the dot binary. An
+    explicit engine (e.g. neato for pinned positions) always runs graphviz.
+    """
+    if engine is None and FAST_LAYOUT_MAX_NODES > 0:
+        try:
+            graph = parse_dot(dot_code)
+            if len(graph.nodes) <= FAST_LAYOUT_MAX_NODES and len(graph.edges) <= FAST_LAYOUT_MAX_EDGES:
+                return layered_layout(graph)
+        except ValueError as e:  # DotParseError, LayoutTooLarge or a malformed size attribute
+            print(f"⚠️ Fast layout skipped, using graphviz: {e}")
+
+    src = graphviz.Source(dot_code)
+    src.engine = engine or 'dot'
+    json_str = src.pipe(format='json').decode('utf-8')
+    return json.loads(json_str)
+
+def edge_route(pos):
+    """
+    Graphviz edge pos ('e,x,y x,y x,y ...') -> (bezier control points as a flat
+    [x0, y0, x1, y1, ...] list, arrow tip [x, y] or None), in React Flow coordinates.
+    """
+    points, tip = [], None
+    for token in pos.split(";")[0].split():
+        parts = token.split(",")
+        if parts[0] in ("s", "e"):
+            if parts[0] == "e":
+                tip = [round(float(parts[1]) * FLOW_SCALE, 1), round(-float(parts[2]) * FLOW_SCALE, 1)]
+            continue
+        points += [round(float(parts[0]) * FLOW_SCALE, 1), round(-float(parts[1]) * FLOW_SCALE, 1)]
+    return points, tip
+
+def reactflow_edge(source_id, target_id, attrs):
+    """
+    One React Flow edge from graphviz edge attributes (style, label/xlabel).
+    A laid-out edge also keeps its graphviz route in data.points (see with_edge_routes).
+    """
+    style = attrs.get('style', 'solid')
+    is_dashed = style == 'dashed' or style == 'dotted'
+    edge_label = attrs.get('label', '') or attrs.get('xlabel', '')
+    if edge_label: edge_label = edge_label.replace('\\n', '\n')
+
+    data = { "isDashed": is_dashed }
+    if attrs.get('pos'):
+        try:
+            data["points"], tip = edge_route(attrs['pos'])
+            if tip: data["arrow"] = tip
+        except (ValueError, IndexError):
+            pass  # an unreadable route: the client routes this edge itself
+
+    return {
+        "id": f"e_{source_id}_{target_id}",
+        "source": source_id,
+        "target": target_id,
+        "animated": True, 
+        "label": edge_label,
+        "type": "smoothstep",
+        "style": { "stroke": "#555", "strokeWidth": 2, "strokeDasharray": "5,5" if is_dashed else "0" },
+        "data": data
+    }
+
+def parse_graphviz_to_reactflow(dot_code, engine=None):
+    try:
+        layout_data = layout_dot(dot_code, engine)
+        
+        nodes = []
+        edges = []
+        
+        SHAPE_MAP = {
+            "diamond": "diamond", "Mdiamond": "diamond", "triangle": "triangle",
+            "box": "default", "rect": "default", "rectangle": "default",
+            "circle": "circle", "doublecircle": "circle", "oval": "circle",
+            "ellipse": "circle", "cylinder": "database", "note": "default"
+        }
+
+        ICON_MAP = {
+            "mysql": "mysql", "cassandra": "cassandra", "postgres": "postgres",
+            "mongo": "mongo", "redis": "redis", "kafka": "kafka",
+            "rabbit": "rabbitmq", "docker": "docker", "k8s": "kubernetes",
+            "react": "react", "python": "python", "user": "user",
+            "aws": "aws", "ec2": "server", "lb": "load-balancer"
+        }
+
+        def process_objects(obj_list, parent_id=None):
+            for obj in obj_list:
+                if obj.get('name', '').startswith('cluster') or obj.get('name', '').startswith('subgraph'):
+                    if 'objects' in obj: process_objects(obj['objects'], obj['name'])
+                    continue
+
+                if not obj.get('name') or obj.get('name').startswith('%'): continue
+
+                pos = obj.get('pos', '0,0').split(',')
+                x = float(pos[0]) * FLOW_SCALE
+                y = -float(pos[1]) * FLOW_SCALE
+                
+                raw_label = obj.get('label', obj['name'])
+                if raw_label == '\\N' or not raw_label.strip(): raw_label = obj['name']
+                
+                label = raw_label.replace('\\n', '\n')
+                label_lower = label.lower()
+
+                node_type = "default"
+                icon_name = None
+
+                for keyword, icon_file in ICON_MAP.items():
+                    if keyword in label_lower:
+                        node_type = "imageNode"
+                        icon_name = icon_file
+                        break
+                
+                if node_type == "default":
+                    gv_shape = obj.get('shape', 'box')
+                    if gv_shape in SHAPE_MAP: node_type = SHAPE_MAP[gv_shape]
+                    if 'service' in label_lower and node_type == 'circle': node_type = 'diamond'
+
+                nodes.append({
+                    "id": obj['name'],
+                    "type": node_type,
+                    "position": {"x": x, "y": y},
+                    "data": { "label": label, "icon": icon_name },
+                    "parentNode": parent_id
+                })
+
+        process_objects(layout_data.get('objects', []))
+
+        for edge in layout_data.get('edges', []):
+            source_id = layout_data['objects'][edge['tail']]['name']
+            target_id = layout_data['objects'][edge['head']]['name']
+            edges.append(reactflow_edge(source_id, target_id, edge))
+            
+        return {"nodes": nodes, "edges": edges}
+
+    except Exception as e:
+        print(f"Graphviz Error: {e}")
+        return None
+
+def with_edge_routes(diagram, routed):
+    """
+    The diagram as a client asked for it. routed: edges that have a graphviz
+    route become type "routed" (drawn from data.points); otherwise routes are
+    dropped and the client's smoothstep routing is used. Never mutates diagram.
+    """
+    edges = []
+    for edge in diagram.get("edges", []):
+        data = edge.get("data") or {}
+        if routed and data.get("points"):
+            edges.append({**edge, "type": "routed"})
+        elif "points" in data or "arrow" in data:
+            edges.append({**edge, "data": {k: v for k, v in data.items() if k not in ("points", "arrow")}})
+        else:
+            edges.append(edge)
+    return {**diagram, "edges": edges}
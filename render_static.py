@@ -0,0 +1,164 @@
+"""
+Batch renderer for the static diagrams (dnswithcolour.py, dnsWithoutcolour.py,
+dnslldwithcolour.py, darkthemeST.py, bluebglld.py).
+
+Each diagram module exposes build() -> graphviz.Digraph. Every graph is laid
+out once (`dot -Tdot` writes the positions and edge routes back into the DOT
+source, kept as <name>.layout.dot); PNG, SVG and PDF are then drawn from that
+laid-out source with `neato -n2`, which does no layout at all. Diagrams render
+in parallel, and a manifest of source hashes lets unchanged diagrams be skipped.
+
+--themes adds recolored variants (<name>.<theme>.<fmt>, see themes.py). They
+are drawn from the same stored layout, so a new theme never reruns layout.
+
+    python render_static.py                          # every diagram, png/svg/pdf
+    python render_static.py darkthemeST --formats svg --force
+    python render_static.py --themes original,dark,light
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+
+import graphviz
+
+from gifrender import render_jobs
+from themes import THEMES, theme_hash, themed_source
+
+DIAGRAMS = ["dnswithcolour", "dnsWithoutcolour", "dnslldwithcolour", "darkthemeST", "bluebglld"]
+OUTPUT_FORMATS = ["png", "svg", "pdf"]
+OUT_DIR = "renders"
+MANIFEST = "manifest.json"
+ORIGINAL = "original"  # the diagram's own colors
+
+
+def source_hash(dot):
+    return hashlib.sha256(f"{dot.engine}\0{dot.source}".encode()).hexdigest()
+
+
+def layout_path(out_dir, name):
+    return os.path.join(out_dir, f"{name}.layout.dot")
+
+
+def output_path(out_dir, name, fmt, theme=ORIGINAL):
+    if theme == ORIGINAL:
+        return os.path.join(out_dir, f"{name}.{fmt}")
+    return os.path.join(out_dir, f"{name}.{theme}.{fmt}")
+
+
+def variant_key(theme, fmt):
+    """Manifest key for one output; its value is the theme's hash."""
+    return f"{theme}.{fmt}"
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def run_layout(job):
+    """Worker: lays one graph out and stores the positioned DOT."""
+    name, engine, source, out_dir = job
+    laid_out = graphviz.Source(source, engine=engine).pipe(format="dot")
+    _write(layout_path(out_dir, name), laid_out)
+    return name
+
+
+def run_draw(job):
+    """Worker: draws one format (optionally themed) from a laid-out graph without laying it out again."""
+    name, fmt, theme, out_dir = job
+    with open(layout_path(out_dir, name)) as f:
+        laid_out = f.read()
+    if theme != ORIGINAL:
+        laid_out = themed_source(laid_out, theme)
+    data = graphviz.Source(laid_out, engine="neato", format=fmt).pipe(neato_no_op=2)
+    path = output_path(out_dir, name, fmt, theme)
+    _write(path, data)
+    return name, theme, fmt, path
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    _write(os.path.join(out_dir, MANIFEST), (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode())
+
+
+def render_all(names=None, formats=OUTPUT_FORMATS, out_dir=OUT_DIR, workers=None, force=False, themes=(ORIGINAL,)):
+    """Renders the named diagrams (all by default) in every theme and format. Returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    digests = {theme: "" if theme == ORIGINAL else theme_hash(theme) for theme in themes}
+    layouts, draws, hashes = [], [], {}
+
+    for name in names or DIAGRAMS:
+        dot = importlib.import_module(name).build()
+        digest = source_hash(dot)
+        entry = manifest.get(name, {})
+        variants = [(theme, fmt) for theme in themes for fmt in formats]
+        if not force and entry.get("hash") == digest and os.path.exists(layout_path(out_dir, name)):
+            # Same graph: the stored layout is still valid, draw only new or changed variants
+            outputs = entry.get("outputs", {})
+            variants = [(theme, fmt) for theme, fmt in variants
+                        if outputs.get(variant_key(theme, fmt)) != digests[theme]
+                        or not os.path.exists(output_path(out_dir, name, fmt, theme))]
+            if not variants:
+                print(f"✅ {name} unchanged, skipping.")
+                continue
+        else:
+            layouts.append((name, dot.engine, dot.source, out_dir))
+            entry = {}
+        draws += [(name, fmt, theme, out_dir) for theme, fmt in variants]
+        manifest[name] = {"hash": digest, "outputs": dict(entry.get("outputs", {}))}
+        hashes[name] = digest
+
+    if not hashes:
+        return []
+    print(f"📐 Laying out {len(layouts)} diagram(s), drawing {len(draws)} file(s)...")
+    for name in render_jobs(run_layout, layouts, workers):
+        print(f"   laid out {name}")
+    written = []
+    for name, theme, fmt, path in render_jobs(run_draw, draws, workers):
+        manifest[name]["outputs"][variant_key(theme, fmt)] = digests[theme]
+        written.append(path)
+        print(f"   wrote {path}")
+
+    save_manifest(out_dir, manifest)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("diagrams", nargs="*", metavar="diagram",
+                        help=f"diagrams to render (default: all of {', '.join(DIAGRAMS)})")
+    parser.add_argument("--formats", default=",".join(OUTPUT_FORMATS),
+                        help="comma-separated output formats (default: png,svg,pdf)")
+    parser.add_argument("--out-dir", default=OUT_DIR)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel graphviz processes (default: GIF_WORKERS or CPU count)")
+    parser.add_argument("--force", action="store_true", help="render even if the source is unchanged")
+    parser.add_argument("--themes", default=ORIGINAL,
+                        help=f"comma-separated: {ORIGINAL} and/or {', '.join(THEMES)} (default: {ORIGINAL})")
+    args = parser.parse_args()
+    unknown = set(args.diagrams) - set(DIAGRAMS)
+    if unknown:
+        parser.error(f"unknown diagram(s): {', '.join(sorted(unknown))}")
+    themes = [t for t in args.themes.split(",") if t]
+    unknown = set(themes) - set(THEMES) - {ORIGINAL}
+    if unknown:
+        parser.error(f"unknown theme(s): {', '.join(sorted(unknown))}")
+
+    try:
+        written = render_all(args.diagrams, [f for f in args.formats.split(",") if f], args.out_dir,
+                             args.workers, args.force, themes)
+    except graphviz.ExecutableNotFound:
+        raise SystemExit("❌ graphviz is not installed (the `dot` binary is needed).")
+    print(f"🎉 Done: {len(written)} file(s) written to {args.out_dir}/")
@@ -0,0 +1,67 @@
+"""
+Production serving for the diagram API.
+
+    SERVE_MODE=prod python main.py
+
+Runs several worker processes (WEB_CONCURRENCY, default one per core). With
+gunicorn installed the app is preloaded once in the master and forked into
+uvicorn workers; otherwise uvicorn's own multi-process mode is used. On
+SIGTERM workers stop accepting connections and get GRACEFUL_TIMEOUT seconds
+to finish in-flight generations before they are killed.
+"""
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+# A cache-miss generation can take ~60s, so give in-flight requests longer than that
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "90"))
+
+
+def worker_count():
+    return int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+if BaseApplication:
+    class _PreloadedApp(BaseApplication):
+        def __init__(self, app_path, options):
+            self.app_path = app_path
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from gunicorn.util import import_app
+            return import_app(self.app_path)
+
+
+def run_production(app_path, host="0.0.0.0", port=8000):
+    workers = worker_count()
+    print(f"🏭 Production mode: {workers} workers on http://{host}:{port}")
+
+    if BaseApplication:
+        _PreloadedApp(app_path, {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "worker_class": "uvicorn.workers.UvicornWorker",
+            "preload_app": True,
+            "graceful_timeout": GRACEFUL_TIMEOUT,
+            # Generations are slow; don't let the arbiter kill a busy worker
+            "timeout": GRACEFUL_TIMEOUT * 2,
+        }).run()
+        return
+
+    print("⚠️ gunicorn not installed, falling back to uvicorn workers (no preload). Run: pip install gunicorn")
+    import uvicorn
+    uvicorn.run(
+        app_path,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+    )
@@ -0,0 +1,94 @@
+"""
+ModelRouter escalation and fallback against stub backends (no network).
+
+    python -m pytest -q test_model_router.py
+"""
+import threading
+import time
+
+import pytest
+
+from model_router import ModelRouter, ModelsUnavailable, parse_tiers
+
+GOOD = "```dot\ndigraph G { a -> b; b -> c; c -> d; d -> e; e -> a; }\n```"
+SPARSE = "digraph G { a -> b; }"
+INVALID = 'digraph G { a -> b [label="x" }'
+TIERS = parse_tiers("fast:0.3,strong:0.3")
+
+
+def stub(answers, delays=None):
+    """backend(model, prompt, timeout) answering from answers[model] (raised if an exception)."""
+    calls = []
+
+    def backend(model, prompt, timeout):
+        calls.append(model)
+        time.sleep((delays or {}).get(model, 0.01))
+        answer = answers[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return {"text": answer, "input_tokens": 100, "output_tokens": 50}
+
+    backend.calls = calls
+    return backend
+
+
+def route(backend, tiers=TIERS, **kwargs):
+    router = ModelRouter(tiers, backend, **kwargs)
+    try:
+        return router, router.generate("prompt", "topic")
+    finally:
+        router.stop()
+
+
+def test_fast_tier_answer_is_used_without_escalating():
+    backend = stub({"fast": GOOD, "strong": GOOD})
+    _, routed = route(backend)
+    assert routed["model"] == "fast" and routed["reason"] == "fast tier"
+    assert routed["dot"].startswith("strict digraph G {")
+    assert backend.calls == ["fast"]
+
+
+@pytest.mark.parametrize("fast, outcome", [(INVALID, "invalid"), (SPARSE, "sparse"), (RuntimeError("503"), "error")])
+def test_escalates_when_the_fast_answer_is_unusable(fast, outcome):
+    backend = stub({"fast": fast, "strong": GOOD})
+    router, routed = route(backend)
+    assert routed["model"] == "strong" and routed["reason"] == f"escalated after {outcome}"
+    assert router.metrics.snapshot()["tiers"]["fast"]["outcomes"] == {outcome: 1}
+
+
+def test_strong_tier_over_its_slo_falls_back_to_the_fast_answer():
+    _, routed = route(stub({"fast": SPARSE, "strong": GOOD}, {"strong": 1.0}))
+    assert routed["model"] == "fast" and routed["reason"] == "best effort (sparse)"
+
+
+def test_sparse_answer_is_preferred_over_an_invalid_one():
+    _, routed = route(stub({"fast": INVALID, "strong": SPARSE}))
+    assert routed["model"] == "strong" and routed["reason"] == "best effort (sparse)"
+
+
+def test_no_answer_from_any_tier_raises():
+    router = ModelRouter(TIERS, stub({"fast": RuntimeError("x"), "strong": RuntimeError("y")}))
+    with pytest.raises(ModelsUnavailable):
+        router.generate("prompt")
+    router.stop()
+    assert router.metrics.snapshot()["decisions"][-1]["reason"] == "no answer"
+
+
+def test_time_waiting_for_a_worker_does_not_count_toward_the_slo():
+    release = threading.Event()
+
+    def backend(model, prompt, timeout):
+        if prompt == "hog":
+            release.wait(2)
+        return {"text": GOOD}
+
+    router = ModelRouter(parse_tiers("fast:0.3"), backend, workers=1)
+    hog = router._pool.submit(backend, "fast", "hog", 2)
+    threading.Timer(0.5, release.set).start()  # longer than the SLO
+    try:
+        routed = router.generate("prompt")
+    finally:
+        hog.result()
+        router.stop()
+    assert routed["reason"] == "fast tier"
+    assert router.metrics.snapshot()["tiers"]["fast"]["latency_p50_ms"] < 300
@@ -0,0 +1,86 @@
+"""
+Color themes applied after layout.
+
+A theme only changes colors (background, cluster, node fill/border/font and
+edge colors), never fonts or sizes, so it can be applied to an already
+laid-out graph (the <name>.layout.dot files render_static.py keeps) and
+drawn with neato -n2: a new theme variant costs one rasterization, not a
+layout. Each cluster's nodes take the next color from the theme's palette, so
+groups stay distinguishable in every theme.
+"""
+import copy
+import hashlib
+import json
+
+from dotparse import parse_dot, to_dot
+
+THEMES = {
+    "light": {
+        "graph": {"bgcolor": "white", "fontcolor": "#212121"},
+        "cluster": {"color": "#9E9E9E", "fontcolor": "#424242"},
+        "node": {"fillcolor": "white", "color": "#424242", "fontcolor": "#212121"},
+        "edge": {"color": "#616161", "fontcolor": "#424242"},
+        "palette": [],
+    },
+    "pastel": {
+        "graph": {"bgcolor": "#F7F9FC", "fontcolor": "#263238"},
+        "cluster": {"color": "#90A4AE", "fontcolor": "#37474F"},
+        "node": {"fillcolor": "#ECEFF1", "color": "#78909C", "fontcolor": "#263238"},
+        "edge": {"color": "#555555", "fontcolor": "#37474F"},
+        "palette": ["#E3F2FD", "#E1F5FE", "#E8F5E9", "#FFF3E0", "#FFFDE7", "#F3E5F5", "#FCE4EC"],
+    },
+    "dark": {
+        "graph": {"bgcolor": "black", "fontcolor": "white"},
+        "cluster": {"color": "#B0BEC5", "fontcolor": "#ECEFF1"},
+        "node": {"fillcolor": "#1A1A1A", "color": "#B0BEC5", "fontcolor": "white"},
+        "edge": {"color": "lightgray", "fontcolor": "white"},
+        "palette": ["#2B0000", "#2A002A", "#402200", "#003333", "#003300", "#333333"],
+    },
+    "midnight": {
+        "graph": {"bgcolor": "#0B0F1A", "fontcolor": "white"},
+        "cluster": {"color": "white", "fontcolor": "white"},
+        "node": {"fillcolor": "#1E293B", "color": "white", "fontcolor": "white"},
+        "edge": {"color": "white", "fontcolor": "white"},
+        "palette": ["#1E293B", "#312E81", "#064E3B", "#7C2D12", "#4C1D95", "#134E4A"],
+    },
+}
+
+
+def theme_hash(name):
+    """Changes whenever the theme's definition does (render_static.py redraws on change)."""
+    return hashlib.sha256(json.dumps(THEMES[name], sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _with_filled(style):
+    parts = [p.strip() for p in (style or "").split(",") if p.strip()]
+    return ",".join(parts if "filled" in parts else parts + ["filled"])
+
+
+def apply_theme(graph, name):
+    """A recolored copy of a parsed (laid-out) DotGraph. Raises KeyError for unknown themes."""
+    theme = THEMES[name]
+    graph = copy.deepcopy(graph)
+    graph.attrs.update(theme["graph"])
+
+    fills = {}
+    for i, (cluster_name, cluster) in enumerate(graph.clusters.items()):
+        cluster["attrs"].update(theme["cluster"])
+        if "filled" in cluster["attrs"].get("style", ""):
+            cluster["attrs"]["fillcolor"] = theme["graph"]["bgcolor"]
+        if theme["palette"]:
+            fills[cluster_name] = theme["palette"][i % len(theme["palette"])]
+
+    for node, attrs in graph.nodes.items():
+        attrs.update(theme["node"])
+        if graph.node_cluster.get(node) in fills:
+            attrs["fillcolor"] = fills[graph.node_cluster[node]]
+        attrs["style"] = _with_filled(attrs.get("style"))
+
+    for _, _, attrs in graph.edges:
+        attrs.update(theme["edge"])
+    return graph
+
+
+def themed_source(laid_out_dot, name):
+    """Laid-out DOT source with a theme applied, ready for neato -n2."""
+    return to_dot(apply_theme(parse_dot(laid_out_dot), name))